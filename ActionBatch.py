@@ -0,0 +1,184 @@
+# --------------------------
+# ActionBatch: Imports many legacy actions in the background. Worker processes parse the .anim files, a timer applies them a few at a time.
+# 18.10.2026
+# --------------------------
+
+import bpy
+import os
+from pathlib import Path
+
+from . import MetaData
+from . import AnimPort
+from . import AnimParser
+from . import WorkerPool
+
+# Keying one action takes a few milliseconds, so blender stays responsive with a handful of actions per tick.
+ACTIONS_PER_TICK = 2
+TICK_INTERVAL = 0.05
+
+# Only one background import runs at a time.
+current_batch = None
+# (messagetype, message) of the last import that ended. Shown in the panel until it is dismissed or the next import starts.
+last_report = None
+
+
+def is_running():
+    # The timer is removed when another file is loaded, which ends the import as well.
+    return current_batch is not None and bpy.app.timers.is_registered(current_batch.timer)
+
+
+def redraw_panels():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == "VIEW_3D":
+                for region in area.regions:
+                    if region.type == "UI":
+                        region.tag_redraw()
+
+
+class ActionBatch:
+    """Imports several action files from a timer. The files are applied in the given order, even if they are parsed in another order."""
+
+    def __init__(self, paths, apply_action, finish, parse_paths):
+        # apply_action(path, parsed_anim_data): Imports one file. parsed_anim_data is None if the file has to be read in blender.
+        # finish(was_cancelled): Called once after the last file was applied or the import was cancelled. Returns messagetype, message.
+        self.paths = paths
+        self.apply_action = apply_action
+        self.finish = finish
+        # Legacy files that need their poses. All other files are applied without parsed data.
+        self.parse_paths = set(parse_paths)
+        # {index: parsed_anim_data}
+        self.ready = {}
+        # Keyed by index
+        self.parse_jobs = None
+        self.finished_count = 0
+        self.current_name = ""
+        # "file name: error" of the files that could not be imported
+        self.errors = []
+        # Bpy only knows a timer by the function object, so the bound method is kept.
+        self.timer = self.tick
+
+    def get_total(self):
+        return len(self.paths)
+
+    def is_finished(self):
+        return self.finished_count >= len(self.paths)
+
+    def get_progress(self):
+        return round(self.finished_count / max(1, len(self.paths)) * 100.0)
+
+    def get_anim_data(self, arrays):
+        anim_data = AnimParser.AnimData.from_arrays(arrays)
+        anim_data.map_bone_names(MetaData.vgroup_map)
+        return anim_data
+
+    def start(self):
+        self.parse_jobs = WorkerPool.ParseJobs("action", "AnimParser", "read_anim_file_arrays", AnimPort.get_anim_cache())
+        legacy_paths = {index: path for index, path in enumerate(self.paths) if path in self.parse_paths}
+        cached, unparsed_paths = self.parse_jobs.start(legacy_paths)
+        for index in range(len(self.paths)):
+            if index in cached:
+                self.ready[index] = self.get_anim_data(cached[index])
+            # Without parsed data, the file is read on the main thread.
+            elif index not in legacy_paths or index in unparsed_paths:
+                self.ready[index] = None
+
+        bpy.app.timers.register(self.timer, first_interval=0.0)
+
+    def collect_parsed(self):
+        for index, path, result in self.parse_jobs.collect():
+            if isinstance(result, BaseException):
+                # Read again in blender, which reports the error if the file itself is broken.
+                print(f"Action worker could not read {os.path.basename(path)}, reading it in blender instead: {result}")
+                self.ready[index] = None
+            else:
+                self.ready[index] = self.get_anim_data(result)
+
+    def apply_ready(self, max_count):
+        applied_count = 0
+        # Waits for the next file in order, so the action entries keep the order of the list.
+        while applied_count < max_count and self.finished_count in self.ready:
+            path = self.paths[self.finished_count]
+            parsed_anim_data = self.ready.pop(self.finished_count)
+            self.current_name = Path(path).stem
+            try:
+                self.apply_action(path, parsed_anim_data)
+            except BaseException as Err:
+                print(f"While importing {os.path.basename(path)}: {Err}")
+                self.errors.append(f"{os.path.basename(path)}: {Err}")
+
+            self.finished_count += 1
+            applied_count += 1
+
+        return applied_count
+
+    def tick(self):
+        if current_batch is not self:
+            self.shutdown()
+            return None
+
+        self.collect_parsed()
+        self.apply_ready(ACTIONS_PER_TICK)
+        bpy.context.scene.action_import_progress = self.get_progress()
+        redraw_panels()
+
+        if self.is_finished():
+            self.end(False)
+            return None
+
+        return TICK_INTERVAL
+
+    def shutdown(self):
+        if self.parse_jobs:
+            self.parse_jobs.shutdown()
+
+    def end(self, was_cancelled, call_finish=True):
+        global current_batch
+        global last_report
+        self.shutdown()
+        self.ready.clear()
+        if current_batch is self:
+            current_batch = None
+        # After the last file, the timer ends itself by returning None.
+        if was_cancelled and bpy.app.timers.is_registered(self.timer):
+            bpy.app.timers.unregister(self.timer)
+
+        if call_finish:
+            messagetype, message = self.finish(was_cancelled)
+            if len(self.errors) > 0:
+                messagetype = "ERROR"
+                message += f" Could not import {', '.join(self.errors)}"
+            last_report = (messagetype, message)
+
+        redraw_panels()
+
+    def cancel(self, call_finish=True):
+        self.end(True, call_finish)
+
+
+def start_batch(paths, apply_action, finish, parse_paths):
+    global current_batch
+    global last_report
+    if is_running():
+        raise RuntimeError("Another action import is still running.")
+    # Left over when a file was loaded during the import.
+    if current_batch:
+        current_batch.shutdown()
+
+    last_report = None
+    current_batch = ActionBatch(paths, apply_action, finish, parse_paths)
+    bpy.context.scene.action_import_progress = 0
+    current_batch.start()
+    return current_batch
+
+
+def dismiss_report():
+    global last_report
+    last_report = None
+    redraw_panels()
+
+
+def cancel_batch(call_finish=True):
+    # Without call_finish, nothing is imported anymore, e.g. when the addon is unregistered. Applied actions stay either way.
+    if current_batch:
+        current_batch.cancel(call_finish)
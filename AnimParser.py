@@ -0,0 +1,215 @@
+# --------------------------
+# AnimParser: Reads legacy .anim files into arrays. Doesn't depend on bpy, so it can be used outside of blender.
+# 18.10.2026
+# --------------------------
+
+import json
+import hashlib
+import numpy as np
+from enum import Enum
+
+# Increase this whenever the arrays of a parsed action change. Cached actions will be parsed again then.
+CACHE_VERSION = 3
+
+
+class anim_import_state(Enum):
+    UNDEFINED = -1
+    DATA = 0
+    ACTION = 1
+
+
+class pose_import_state(Enum):
+    UNDEFINED = -1
+    BONENAME = 0
+    FRAME = 1
+    LOCATION = 2
+    ROTATION = 3
+    SCALE = 4
+
+
+# Layout of the last axis of AnimData.poses
+POSE_CHANNELS = 10
+LOCATION_CHANNELS = slice(0, 3)
+# Euler rotations only use the first 3 of the 4 rotation channels.
+ROTATION_START = 3
+SCALE_CHANNELS = slice(7, 10)
+
+
+def ReadPoseArray(lines, size):
+    return np.fromstring(" ".join(lines), dtype=np.float32, sep=" ").reshape(-1, size)
+
+
+def ReadRotationArray(lines):
+    # A bone either uses euler rotations (3 values) or quaternions (4 values).
+    rotations = np.fromstring(" ".join(lines), dtype=np.float32, sep=" ")
+    if len(lines) == 0 or rotations.size == len(lines) * 4:
+        return rotations.reshape(-1, 4), 4
+    if rotations.size == len(lines) * 3:
+        return rotations.reshape(-1, 3), 3
+
+    # Mixed rotations: The first line decides, other lines are left out.
+    rotation_size = len(lines[0].split())
+    rotations = np.full((len(lines), rotation_size), np.nan, dtype=np.float32)
+    for row, line in enumerate(lines):
+        values = line.split()
+        if len(values) == rotation_size:
+            rotations[row] = [float(value) for value in values]
+        else:
+            print(f"Left out rotation \"{line}\", because the bone uses {rotation_size} rotation values.")
+
+    return rotations, rotation_size
+
+
+class AnimData:
+    """Parsed content of a .anim file. Poses are kept in one array with the shape (bones, frames, POSE_CHANNELS)."""
+
+    def __init__(self):
+        # [Data]: Width, Height and Length as int, everything else (e.g. Tool1, Tool2) as str
+        self.header = {}
+        self.bone_names = []
+        self.frames = np.zeros(0, dtype=np.int32)
+        # 3 for euler rotations, 4 for quaternions
+        self.rotation_sizes = np.zeros(0, dtype=np.int8)
+        # Location, rotation and scale per bone and frame. Frames that a bone has no pose for are NaN.
+        self.poses = np.zeros((0, 0, POSE_CHANNELS), dtype=np.float32)
+
+    def map_bone_names(self, bone_map):
+        # bone_map: {lowercase bone name: new bone name}, e.g. MetaData.vgroup_map
+        self.bone_names = [bone_map.get(bone_name.lower(), bone_name) for bone_name in self.bone_names]
+
+    def to_arrays(self):
+        # Arrays and plain records, so it can be sent to other processes and cached, see ContentCache.pack_records.
+        records = {
+            "Header": self.header,
+            "BoneNames": self.bone_names
+        }
+        return {
+            "Frames": self.frames,
+            "RotationSizes": self.rotation_sizes,
+            "Poses": self.poses,
+            "Records": records,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        anim_data = cls()
+        records = arrays["Records"]
+        anim_data.header = records["Header"]
+        anim_data.bone_names = records["BoneNames"]
+        anim_data.frames = arrays["Frames"]
+        anim_data.rotation_sizes = arrays["RotationSizes"]
+        anim_data.poses = arrays["Poses"]
+        return anim_data
+
+    def get_pose_hash(self):
+        # Files with the same hash result in the same action.
+        pose_hash = hashlib.sha1(json.dumps(self.bone_names).encode("utf-8"))
+        for array in [self.frames, self.rotation_sizes, self.poses]:
+            pose_hash.update(np.ascontiguousarray(array).tobytes())
+
+        return pose_hash.hexdigest()
+
+    def get_bone_channels(self, bone_index):
+        # [[channel_name, channels]]
+        rotation_size = int(self.rotation_sizes[bone_index])
+        rotation_name = "rotation_euler" if rotation_size == 3 else "rotation_quaternion"
+        return [["location", LOCATION_CHANNELS],
+                [rotation_name, slice(ROTATION_START, ROTATION_START + rotation_size)],
+                ["scale", SCALE_CHANNELS]]
+
+
+def read_anim_lines(lines, bone_map=None, header_only=False):
+    # bone_map: {lowercase bone name: new bone name}, e.g. MetaData.vgroup_map
+    anim_data = AnimData()
+    # [[bone_name, frames, location_lines, rotation_lines, scale_lines]]
+    bones = []
+    current_bone = None
+    current_frame = 0
+    current_pose_import_state = pose_import_state.BONENAME
+
+    mode = anim_import_state.DATA
+    for line in lines:
+        line = line.strip()
+        if len(line) == 0:
+            continue
+
+        if line == "[Data]":
+            mode = anim_import_state.DATA
+
+        elif line == "[Action]":
+            if header_only:
+                break
+            mode = anim_import_state.ACTION
+
+        elif mode == anim_import_state.DATA:
+            if "=" not in line:
+                continue
+            param_name, param_value = line.split("=", 1)
+
+            if param_name == "Width" or param_name == "Height" or param_name == "Length":
+                anim_data.header[param_name] = int(param_value)
+            # Tools..
+            else:
+                anim_data.header[param_name] = param_value
+
+        elif mode == anim_import_state.ACTION:
+            if line[0] == "[":
+                current_frame = int(line.replace("[", "").replace("]", ""))
+                current_pose_import_state = pose_import_state.LOCATION
+
+            elif current_pose_import_state == pose_import_state.BONENAME:
+                current_bone = [line.replace(":", ""), [], [], [], []]
+                bones.append(current_bone)
+                current_pose_import_state = pose_import_state.LOCATION
+
+            elif current_bone is None:
+                continue
+
+            elif current_pose_import_state == pose_import_state.LOCATION:
+                current_bone[1].append(current_frame)
+                current_bone[2].append(line)
+                current_pose_import_state = pose_import_state.ROTATION
+
+            elif current_pose_import_state == pose_import_state.ROTATION:
+                current_bone[3].append(line)
+                current_pose_import_state = pose_import_state.SCALE
+
+            elif current_pose_import_state == pose_import_state.SCALE:
+                current_bone[4].append(line)
+                # In case the next line doesn't start with "[", there will be a new bone pose.
+                current_pose_import_state = pose_import_state.BONENAME
+
+    anim_data.bone_names = [bone[0] for bone in bones]
+    anim_data.frames = np.unique(np.array([frame for bone in bones for frame in bone[1]], dtype=np.int32))
+    anim_data.rotation_sizes = np.zeros(len(bones), dtype=np.int8)
+    anim_data.poses = np.full((len(bones), len(anim_data.frames), POSE_CHANNELS), np.nan, dtype=np.float32)
+
+    for bone_index, (bone_name, frames, location_lines, rotation_lines, scale_lines) in enumerate(bones):
+        frame_rows = np.searchsorted(anim_data.frames, frames)
+        bone_poses = anim_data.poses[bone_index]
+        # The last pose might be incomplete, so rotation and scale can have fewer lines.
+        bone_poses[frame_rows, LOCATION_CHANNELS] = ReadPoseArray(location_lines, 3)
+        rotations, rotation_size = ReadRotationArray(rotation_lines)
+        bone_poses[frame_rows[0:len(rotations)], ROTATION_START:ROTATION_START + rotation_size] = rotations
+        bone_poses[frame_rows[0:len(scale_lines)], SCALE_CHANNELS] = ReadPoseArray(scale_lines, 3)
+        anim_data.rotation_sizes[bone_index] = rotation_size
+
+    if bone_map:
+        anim_data.map_bone_names(bone_map)
+
+    return anim_data
+
+
+def read_anim_file(path, bone_map=None, header_only=False):
+    with open(path, "r", encoding="ISO-8859-1") as file:
+        return read_anim_lines(file, bone_map, header_only)
+
+
+def read_anim_header(path):
+    # Stops before [Action], so only the first few lines of the file are read.
+    return read_anim_file(path, header_only=True).header
+
+
+def read_anim_file_arrays(path):
+    # Entry point of the worker processes. The bone names stay unmapped, the main process maps them just like cache entries.
+    return read_anim_file(path).to_arrays()
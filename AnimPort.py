@@ -7,38 +7,15 @@
 # API Upgrade 11.02.2022
 # Robin Hohnsbeen (Ryou)
 
-from enum import Enum
 import bpy
 import os.path
 import os
+import numpy as np
 
 from . import MetaData
-
-
-class anim_import_state(Enum):
-    UNDEFINED = -1
-    DATA = 0
-    ACTION = 1
-
-
-class pose_import_state(Enum):
-    UNDEFINED = -1
-    BONENAME = 0
-    FRAME = 1
-    LOCATION = 2
-    ROTATION = 3
-    SCALE = 4
-
-
-def get_anim_import_state(line):
-    key = line[0:-1]
-
-    if key == "[DATA]":
-        return anim_import_state.DATA
-    elif key == "[Vertices]":
-        return anim_import_state.ACTION
-    else:
-        return anim_import_state.UNDEFINED
+from . import AnimParser
+from . import ContentCache
+from . import BlendLibrary
 
 
 def ResetArmature(armature_ob: bpy.types.Object):
@@ -52,7 +29,317 @@ def ResetArmature(armature_ob: bpy.types.Object):
         bone.scale = [1.0, 1.0, 1.0]
 
 
-def LoadActionLegacy(path, animation_target, force_import_action=False):
+def get_anim_cache():
+    return ContentCache.get_cache("Actions", AnimParser.CACHE_VERSION)
+
+
+def read_anim_file_cached(path, header_only=False):
+    cache = get_anim_cache()
+    if cache:
+        arrays = cache.load(path)
+        if arrays is not None:
+            anim_data = AnimParser.AnimData.from_arrays(arrays)
+            anim_data.map_bone_names(MetaData.vgroup_map)
+            return anim_data
+
+    # The header alone is quick to read, so it is not worth a cache entry.
+    if header_only:
+        return AnimParser.read_anim_file(path, MetaData.vgroup_map, header_only=True)
+
+    # Cached with the original bone names, so changes of the bone mapping don't need a new entry.
+    anim_data = AnimParser.read_anim_file(path)
+    if cache:
+        cache.store(path, anim_data.to_arrays())
+    anim_data.map_bone_names(MetaData.vgroup_map)
+
+    return anim_data
+
+
+def get_keyframe_interpolation(interpolation=None):
+    # Default: The same interpolation keyframe_insert would use.
+    if interpolation is None:
+        interpolation = bpy.context.preferences.edit.keyframe_new_interpolation_type
+    return bpy.types.Keyframe.bl_rna.properties["interpolation"].enum_items[interpolation].value
+
+
+def remove_fcurve(action, data_path, index):
+    fcurve = action.fcurves.find(data_path, index=index)
+    if fcurve:
+        action.fcurves.remove(fcurve)
+
+
+def write_fcurve(action, data_path, index, group_name, frames, values, interpolations):
+    # Writes all keys of a channel at once instead of calling keyframe_insert for every frame.
+    remove_fcurve(action, data_path, index)
+    fcurve = action.fcurves.new(data_path, index=index, action_group=group_name)
+
+    keyframe_count = len(frames)
+    keyframe_coordinates = np.empty((keyframe_count, 2), dtype=np.float32)
+    keyframe_coordinates[:, 0] = frames
+    keyframe_coordinates[:, 1] = values
+
+    fcurve.keyframe_points.add(keyframe_count)
+    fcurve.keyframe_points.foreach_set("co", keyframe_coordinates.ravel())
+    fcurve.keyframe_points.foreach_set("interpolation", interpolations)
+    # Sorts the keys and calculates the handles.
+    fcurve.update()
+
+
+# Values of a pose bone after ResetArmature, which prepare_action calls before every action.
+rest_values = {
+    "location": [0.0, 0.0, 0.0],
+    "rotation_euler": [0.0, 0.0, 0.0],
+    "rotation_quaternion": [1.0, 0.0, 0.0, 0.0],
+    "scale": [1.0, 1.0, 1.0]
+}
+
+# Legacy files store 6 decimals, so anything below this difference is not visible.
+SIMPLIFY_TOLERANCE = 0.0001
+
+
+def is_on_line(frames, values, start, end, tolerance):
+    weights = (frames[start + 1:end] - frames[start]) / (frames[end] - frames[start])
+    line_values = values[start] + (values[end] - values[start]) * weights
+    return np.all(np.abs(values[start + 1:end] - line_values) <= tolerance)
+
+
+def get_simplified_keys(frames, values, rest_value, tolerance=SIMPLIFY_TOLERANCE):
+    # Returns the indices of the keys to keep and whether a key starts a linear run.
+    # Channels that stay at their rest value need no keys at all, other constant channels need one.
+    if np.all(np.abs(values - rest_value) <= tolerance):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    if np.ptp(values) <= tolerance:
+        return np.zeros(1, dtype=np.int64), np.zeros(1, dtype=bool)
+
+    kept_keys = [0]
+    is_linear = [False]
+    start = 0
+    while start < len(values) - 1:
+        end = start + 1
+        # Extend the run as long as all keys in between are on the line from start to end.
+        while end + 1 < len(values) and is_on_line(frames, values, start, end + 1, tolerance):
+            end += 1
+
+        is_linear[-1] = end - start > 1
+        kept_keys.append(end)
+        is_linear.append(False)
+        start = end
+
+    return np.array(kept_keys), np.array(is_linear)
+
+
+# Pose bone index of each bone of a file: {(armature pointer, bone names): (pose bone count, [pose bone index or SKIP_BONE])}
+bone_resolutions = {}
+SKIP_BONE = -1
+# Every set of bone names of a file is one entry. Resolving again is cheap, so the entries are dropped instead of growing without end.
+MAX_BONE_RESOLUTIONS = 64
+
+
+def is_bone_resolution_valid(pose_bones, bone_names, bone_resolution):
+    # Bones might have been added, removed or renamed since.
+    pose_bone_count, pose_bone_indices = bone_resolution
+    if len(pose_bones) != pose_bone_count:
+        return False
+
+    for bone_name, pose_bone_index in zip(bone_names, pose_bone_indices):
+        # A bone that was missing might exist now, e.g. after a rename or on another armature at the same pointer.
+        if pose_bone_index == SKIP_BONE:
+            if pose_bones.get(bone_name) is not None:
+                return False
+        elif pose_bones[pose_bone_index].name != bone_name:
+            return False
+
+    return True
+
+
+def get_bone_resolution(armature_ob, bone_names):
+    pose_bones = armature_ob.pose.bones
+    key = (armature_ob.as_pointer(), tuple(bone_names))
+    bone_resolution = bone_resolutions.get(key)
+    if bone_resolution and is_bone_resolution_valid(pose_bones, bone_names, bone_resolution):
+        return bone_resolution[1]
+
+    pose_bone_indices = {pose_bone.name: index for index, pose_bone in enumerate(pose_bones)}
+    bone_resolution = (len(pose_bones), [pose_bone_indices.get(bone_name, SKIP_BONE) for bone_name in bone_names])
+    if len(bone_resolutions) >= MAX_BONE_RESOLUTIONS:
+        bone_resolutions.clear()
+    bone_resolutions[key] = bone_resolution
+
+    return bone_resolution[1]
+
+
+def apply_anim_data(action, anim_data: AnimParser.AnimData, armature_ob, simplify_keys=False):
+    # Returns the number of keys that were left out by simplify_keys and the bones that are not on the armature.
+    pose_bone_indices = get_bone_resolution(armature_ob, anim_data.bone_names)
+    missing_bones = [bone_name for bone_name, pose_bone_index in zip(anim_data.bone_names, pose_bone_indices) if pose_bone_index == SKIP_BONE]
+    if len(missing_bones) > 0:
+        print(f"{len(missing_bones)} bones do not exist on armature \"{armature_ob.name}\": {', '.join(missing_bones)}")
+
+    interpolation = get_keyframe_interpolation()
+    linear_interpolation = get_keyframe_interpolation("LINEAR")
+    removed_key_count = 0
+    for bone_index, pose_bone_index in enumerate(pose_bone_indices):
+        if pose_bone_index == SKIP_BONE:
+            continue
+
+        bone_name = anim_data.bone_names[bone_index]
+        bone_poses = anim_data.poses[bone_index]
+        bone_data_path = f'pose.bones["{bpy.utils.escape_identifier(bone_name)}"]'
+        for channel_name, channels in anim_data.get_bone_channels(bone_index):
+            values = bone_poses[:, channels]
+            # Frames that this channel has no value for.
+            has_value = np.isnan(values[:, 0]) == False
+            if np.any(has_value) == False:
+                continue
+
+            data_path = f"{bone_data_path}.{channel_name}"
+            for index in range(values.shape[1]):
+                frames = anim_data.frames[has_value]
+                channel_values = values[has_value, index]
+                interpolations = [interpolation] * len(frames)
+
+                if simplify_keys:
+                    kept_keys, is_linear = get_simplified_keys(frames, channel_values, rest_values[channel_name][index])
+                    removed_key_count += len(frames) - len(kept_keys)
+                    if len(kept_keys) == 0:
+                        remove_fcurve(action, data_path, index)
+                        continue
+
+                    frames, channel_values = frames[kept_keys], channel_values[kept_keys]
+                    interpolations = [linear_interpolation if linear else interpolation for linear in is_linear]
+
+                write_fcurve(action, data_path, index, bone_name, frames, channel_values, interpolations)
+
+    return removed_key_count, missing_bones
+
+
+# Custom property of imported actions. Actions with the same pose data are shared.
+POSE_HASH_PROPERTY = "RenderClonkPoseHash"
+
+
+def get_pose_hash_actions():
+    # {pose hash: action} of all imported actions. Built once per import, so not every file has to go through all actions.
+    pose_hash_actions = {}
+    for action in bpy.data.actions:
+        pose_hash = action.get(POSE_HASH_PROPERTY)
+        if pose_hash is not None:
+            pose_hash_actions.setdefault(pose_hash, action)
+
+    return pose_hash_actions
+
+
+def find_action_by_pose_hash(pose_hash, pose_hash_actions):
+    action = pose_hash_actions.get(pose_hash)
+    if action is None:
+        return None
+    # The action might have been removed or keyed again since the map was built.
+    try:
+        if action.get(POSE_HASH_PROPERTY) == pose_hash:
+            return action
+    except ReferenceError:
+        pass
+
+    del pose_hash_actions[pose_hash]
+    return None
+
+
+def get_action_record(path, name, header=None):
+    header = header or {}
+    action_name = name
+    if action_name.lower() in MetaData.action_map:
+        action_name = MetaData.action_map[action_name.lower()]
+
+    return {
+        "Path": path,
+        "Name": action_name,
+        "Format": "Blend" if ".blend" in path else "Legacy",
+        "Width": header.get("Width", 0),
+        "Height": header.get("Height", 0),
+        "Length": header.get("Length", 0),
+        "Tool1": header.get("Tool1", ""),
+        "Tool2": header.get("Tool2", ""),
+    }
+
+
+def peek_action_file(path, header=None):
+    # Returns the action records of a file without creating any datablock. header: [Data] of a legacy file, if it is known already.
+    if ".animblend" in path or ".anim.blend" in path:
+        # Only the names can be read without loading the scene that holds the animlist.
+        return [get_action_record(path, action_name) for action_name in BlendLibrary.get_catalog(path)["actions"]]
+
+    filename = os.path.splitext(os.path.basename(path))[0]
+    if header is None:
+        header = AnimParser.read_anim_header(path)
+    return [get_action_record(path, filename, header)]
+
+
+def key_action(action, parsed_anim_data, armature_ob, simplify_keys, anim_data):
+    action[POSE_HASH_PROPERTY] = parsed_anim_data.get_pose_hash()
+    removed_key_count, missing_bones = apply_anim_data(action, parsed_anim_data, armature_ob, simplify_keys)
+    if len(missing_bones) > 0:
+        anim_data["MissingBones"] = missing_bones
+    if simplify_keys:
+        anim_data["RemovedKeys"] = removed_key_count
+        print(f"Removed {removed_key_count} keys from \"{action.name}\"")
+
+
+# Custom properties of lazily imported actions, which are keyed the first time they are used.
+PENDING_SOURCE_PROPERTY = "RenderClonkPendingSource"
+PENDING_SIMPLIFY_PROPERTY = "RenderClonkPendingSimplify"
+
+
+def is_action_pending(action):
+    return action is not None and action.get(PENDING_SOURCE_PROPERTY) is not None
+
+
+def MaterializeAction(action, armature_ob):
+    path = action[PENDING_SOURCE_PROPERTY]
+    if os.path.exists(path) == False:
+        raise FileNotFoundError(f"Action \"{action.name}\" can't be loaded, because its file is missing: {path}")
+
+    print("Load Action \"" + action.name + "\"")
+    anim_data = {}
+    key_action(action, read_anim_file_cached(path), armature_ob, action.get(PENDING_SIMPLIFY_PROPERTY, False), anim_data)
+    del action[PENDING_SOURCE_PROPERTY]
+    if action.get(PENDING_SIMPLIFY_PROPERTY) is not None:
+        del action[PENDING_SIMPLIFY_PROPERTY]
+
+    return anim_data
+
+
+def materialize_action_entries(action_entries):
+    # Keys the actions of lazily imported entries. Returns the number of actions that were keyed.
+    pending_actions = []
+    for action_entry in action_entries:
+        if is_action_pending(action_entry.action) and action_entry.action not in pending_actions:
+            pending_actions.append(action_entry.action)
+
+    if len(pending_actions) == 0:
+        return 0
+
+    armature_ob = None
+    for anim_target in MetaData.get_anim_targets():
+        if anim_target and anim_target.type == "ARMATURE":
+            armature_ob = anim_target
+            break
+    if armature_ob is None:
+        raise AssertionError("No armature found in the anim targets.")
+
+    wm = bpy.context.window_manager
+    wm.progress_begin(0, len(pending_actions))
+    try:
+        for action_index, action in enumerate(pending_actions):
+            MaterializeAction(action, armature_ob)
+            wm.progress_update(action_index + 1)
+    finally:
+        wm.progress_end()
+
+    return len(pending_actions)
+
+
+def LoadActionLegacy(path, animation_target, force_import_action=False, simplify_keys=False, lazy=False, parsed_anim_data=None, pose_hash_actions=None):
+    # parsed_anim_data: AnimData that was already read (e.g. by a worker process). Otherwise the file is read here.
+    # pose_hash_actions: See get_pose_hash_actions. Imports of several files share it, a single file builds its own.
     splitpath = str.split(path, os.sep)
     (filename, extension) = os.path.splitext(splitpath[len(splitpath)-1])
     anim_data = {}
@@ -63,7 +350,7 @@ def LoadActionLegacy(path, animation_target, force_import_action=False):
         raise FileNotFoundError("No valid action file at: " + path)
 
     actions = bpy.data.actions
-    current_action = 0
+    current_action = None
     old_action_found = False
 
     if actions.find(filename) > -1:
@@ -71,101 +358,92 @@ def LoadActionLegacy(path, animation_target, force_import_action=False):
         old_action_found = True
         print("Reuse Action \"" + str(filename) + "\"")
 
-    if not current_action:
+    # An action that is reused only needs the header. Lazy imports read the poses when the action is used the first time.
+    is_reused = old_action_found and force_import_action == False
+    header_only = is_reused or lazy
+    if parsed_anim_data is None:
+        parsed_anim_data = read_anim_file_cached(path, header_only)
+    anim_data.update(parsed_anim_data.header)
+
+    is_action_shared = False
+    if header_only == False and current_action is None:
+        if pose_hash_actions is None:
+            pose_hash_actions = get_pose_hash_actions()
+        current_action = find_action_by_pose_hash(parsed_anim_data.get_pose_hash(), pose_hash_actions)
+        # The same animation under another file name: The entry gets its own name, but uses the same action.
+        if current_action:
+            is_action_shared = True
+            anim_data["AlternativeName"] = filename
+            print("Share Action \"" + current_action.name + "\" with \"" + str(filename) + "\"")
+
+    if current_action is None:
         current_action = actions.new(name=filename)
         current_action.use_fake_user = True
         print("Import Action \"" + str(filename) + "\"")
 
     armature_ob = animation_target
-
-    armature_ob.animation_data.action = current_action
     anim_data["Action"] = current_action
 
-    pose = armature_ob.pose
-    bones = pose.bones
-
-    file = open(path, "r", encoding="ISO-8859-1")
-    lines = file.readlines()
-
-    current_bone_name = ""
-    current_frame = 0
-    current_pose_import_state = pose_import_state.BONENAME
-
-    mode = anim_import_state.DATA
-    for line in lines:
-        line = line.strip().replace("\n", "")
-        if line == "[Data]":
-            mode = anim_import_state.DATA
-
-        elif line == "[Action]":
-            if old_action_found and force_import_action == False:
-                return anim_data
-
-            mode = anim_import_state.ACTION
-
-        elif mode == anim_import_state.DATA:
-            line = line.split("=")
-            param_name, param_value = line[0], line[1].replace("\n", "")
-
-            if param_name == "Width" or param_name == "Height" or param_name == "Length":
-                anim_data[param_name] = int(param_value)
-            # Tools..
-            else:
-                anim_data[param_name] = param_value
-
-        elif mode == anim_import_state.ACTION:
-            if line[0] == "[":
-                current_frame = int(line.replace("[", "").replace("]", ""))
-                current_pose_import_state = pose_import_state.LOCATION
-
-            elif current_pose_import_state == pose_import_state.BONENAME:
-                current_bone_name = line.replace(":", "").replace("\n", "")
-                mapping = MetaData.get_vgroup_mapping(current_bone_name)
-                if mapping:
-                    current_bone_name = mapping
-
-                current_pose_import_state = pose_import_state.LOCATION
-
-                # TODO: Add bone not found exception
-                if bones[current_bone_name] == -1:
-                    print(
-                        current_bone_name + " does not exist on armature \"" + armature_ob.name + "\".")
-
-            elif current_pose_import_state == pose_import_state.LOCATION:
-                location = line.split(" ")
-                bones[current_bone_name].location = [
-                    float(location[0]), float(location[1]), float(location[2])]
-                bones[current_bone_name].keyframe_insert(
-                    data_path="location", frame=current_frame)
-
-                current_pose_import_state = pose_import_state.ROTATION
-
-            elif current_pose_import_state == pose_import_state.ROTATION:
-                rotation = line.split(" ")
-                if len(rotation) == 3:
-                    bones[current_bone_name].rotation_euler = [
-                        float(rotation[0]), float(rotation[1]), float(rotation[2])]
-                    bones[current_bone_name].keyframe_insert(
-                        data_path="rotation_euler", frame=current_frame)
-                elif len(rotation) == 4:
-                    bones[current_bone_name].rotation_quaternion = [
-                        float(rotation[0]), float(rotation[1]), float(rotation[2]), float(rotation[3])]
-                    bones[current_bone_name].keyframe_insert(
-                        data_path="rotation_quaternion", frame=current_frame)
-
-                current_pose_import_state = pose_import_state.SCALE
-
-            elif current_pose_import_state == pose_import_state.SCALE:
-                scale = line.split(" ")
-                bones[current_bone_name].scale = [
-                    float(scale[0]), float(scale[1]), float(scale[2])]
-                bones[current_bone_name].keyframe_insert(
-                    data_path="scale", frame=current_frame)
-
-                # In case the next line doesn't start with "[", there will be a new bone pose.
-                current_pose_import_state = pose_import_state.BONENAME
-
-    file.close()
+    if lazy and is_reused == False:
+        current_action[PENDING_SOURCE_PROPERTY] = path
+        current_action[PENDING_SIMPLIFY_PROPERTY] = simplify_keys
+    elif header_only == False and is_action_shared == False:
+        key_action(current_action, parsed_anim_data, armature_ob, simplify_keys, anim_data)
+        if pose_hash_actions is not None:
+            pose_hash_actions[current_action[POSE_HASH_PROPERTY]] = current_action
 
     # So we get the meta data about the animation as well.
     return anim_data
+
+
+def sample_fcurves(fcurves, data_path, frames, rest_value):
+    # Channels without an F-curve keep their rest value, just like after ResetArmature.
+    samples = np.empty((len(frames), len(rest_value)), dtype=np.float64)
+    for index in range(len(rest_value)):
+        fcurve = fcurves.get((data_path, index))
+        if fcurve:
+            samples[:, index] = [fcurve.evaluate(frame) for frame in frames]
+        else:
+            samples[:, index] = rest_value[index]
+
+    return samples
+
+
+def get_sample_lines(samples):
+    return [" ".join(f"{value:f}" for value in row) for row in samples]
+
+
+def get_legacy_bone_names():
+    # Inverse of the bones in MetaData.vgroup_map, e.g. {"Head": "kopf"}. Names that several legacy names map to (like Tool1) are written as they are.
+    legacy_names = {}
+    for legacy_name, bone_name in MetaData.vgroup_map.items():
+        legacy_names.setdefault(bone_name, []).append(legacy_name)
+
+    return {bone_name: names[0] for bone_name, names in legacy_names.items() if len(names) == 1}
+
+
+def SaveActionLegacy(path, action, armature_ob, frame_start, frame_end, header):
+    # Samples the F-curves directly, so no frame needs to be set on the scene.
+    # Bones are written under their legacy names, which the older tools expect.
+    legacy_bone_names = get_legacy_bone_names()
+    frames = np.arange(frame_start, frame_end + 1)
+    fcurves = {(fcurve.data_path, fcurve.array_index): fcurve for fcurve in action.fcurves}
+
+    lines = ["[Data]"]
+    for param_name, param_value in header.items():
+        lines.append(f"{param_name}={param_value}")
+    lines.append("[Action]")
+
+    for pose_bone in armature_ob.pose.bones:
+        bone_data_path = f'pose.bones["{bpy.utils.escape_identifier(pose_bone.name)}"]'
+        rotation_name = "rotation_quaternion" if pose_bone.rotation_mode == "QUATERNION" else "rotation_euler"
+        location_lines = get_sample_lines(sample_fcurves(fcurves, f"{bone_data_path}.location", frames, rest_values["location"]))
+        rotation_lines = get_sample_lines(sample_fcurves(fcurves, f"{bone_data_path}.{rotation_name}", frames, rest_values[rotation_name]))
+        scale_lines = get_sample_lines(sample_fcurves(fcurves, f"{bone_data_path}.scale", frames, rest_values["scale"]))
+
+        lines.append(legacy_bone_names.get(pose_bone.name, pose_bone.name) + ":")
+        for frame, location, rotation, scale in zip(frames, location_lines, rotation_lines, scale_lines):
+            lines += [f"[{frame}]", location, rotation, scale]
+
+    with open(path, "w", encoding="ISO-8859-1", newline="\n") as file:
+        file.write("\n".join(lines) + "\n")
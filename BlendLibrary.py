@@ -0,0 +1,57 @@
+# --------------------------
+# BlendLibrary: Knows which datablocks a .blend library holds and loads only the ones that are asked for.
+# 18.10.2026
+# --------------------------
+
+import bpy
+import os
+
+# Datablock types that are listed in a catalog
+catalog_types = ["scenes", "actions", "objects", "collections"]
+
+# {path: {"Signature": (size, mtime), "scenes": [names], "actions": [names], ...}}
+library_catalogs = {}
+
+
+def get_file_signature(path):
+    file_stat = os.stat(path)
+    return (file_stat.st_size, file_stat.st_mtime_ns)
+
+
+def store_catalog(path, signature, data_from):
+    catalog = {data_type: list(getattr(data_from, data_type)) for data_type in catalog_types}
+    catalog["Signature"] = signature
+    library_catalogs[path] = catalog
+    return catalog
+
+
+def get_catalog(path):
+    # Lists the names of the datablocks without loading any of them. Only read again if the file changed.
+    signature = get_file_signature(path)
+    catalog = library_catalogs.get(path)
+    if catalog is None or catalog["Signature"] != signature:
+        with bpy.data.libraries.load(path) as (data_from, data_to):
+            catalog = store_catalog(path, signature, data_from)
+
+    return catalog
+
+
+def load_datablocks(path, requested):
+    # requested: {data_type: [names] or None for all of them}, e.g. {"objects": ["Dagger"]}
+    # The library is opened once for all of them. Returns {data_type: {name in the library: datablock}},
+    # because appended datablocks are renamed if their name is taken already.
+    signature = get_file_signature(path)
+    requested_names = {}
+    with bpy.data.libraries.load(path) as (data_from, data_to):
+        # The names are known anyway, so the catalog is updated on the way.
+        store_catalog(path, signature, data_from)
+        for data_type, names in requested.items():
+            available_names = getattr(data_from, data_type)
+            if names is None:
+                requested_names[data_type] = list(available_names)
+            else:
+                requested_names[data_type] = [name for name in dict.fromkeys(names) if name in available_names]
+            setattr(data_to, data_type, list(requested_names[data_type]))
+
+    return {data_type: {name: datablock for name, datablock in zip(names, getattr(data_to, data_type)) if datablock is not None}
+            for data_type, names in requested_names.items()}
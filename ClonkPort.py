@@ -6,11 +6,10 @@
 
 from operator import mod
 import bpy
-from bpy.props import StringProperty, BoolProperty, IntProperty
+from bpy.props import StringProperty, BoolProperty, IntProperty, CollectionProperty
 
 import math
 import mathutils
-import glob  # for wildcard directory search
 
 from bpy_extras.io_utils import ImportHelper
 from bpy_extras.io_utils import ExportHelper
@@ -18,7 +17,11 @@ from pathlib import Path
 import os
 from . import AnimPort
 from . import MeshPort
+from . import MeshBatch
+from . import ActionBatch
 from . import MetaData
+from . import ContentIndex
+from . import BlendLibrary
 from . import PathUtilities
 from . import IniPort
 from . import SpritesheetMaker
@@ -29,65 +32,147 @@ AddonDir = os.path.dirname(script_file)
 found_meshes = []
 found_actions = []
 found_actionlists = []
-last_search_path = ""
+# ContentIndex.ContentScan of the last search, which also has the records of the files above.
+found_content = ContentIndex.ContentScan()
+# Lookups by file name, built once per search
+found_mesh_lookup = ContentIndex.ContentLookup([])
+found_action_lookup = ContentIndex.ContentLookup([])
+content_index = None
 
 
 def get_res_multiplier():
     return bpy.context.scene.render.resolution_percentage / 100.0
 
 
-def content_glob_search(path):
-    global found_meshes
-    global found_actions
-    global found_actionlists
+def get_content_index():
+    global content_index
+    addon_prefs = bpy.context.preferences.addons[__package__].preferences
+    # With the content cache turned off, the index is only kept in memory.
+    index_path = None
+    if addon_prefs.use_content_cache:
+        index_path = os.path.join(PathUtilities.GetCachePath("Index"), "ContentIndex.json")
 
-    found_meshes += glob.glob(os.path.join(path, "*.mesh*"), recursive=False)
-    found_actions += glob.glob(os.path.join(path, "*.anim*"), recursive=False)
-    found_actionlists += glob.glob(os.path.join(path, "*.act"), recursive=False)
+    if content_index is None or content_index.index_path != index_path:
+        content_index = ContentIndex.ContentIndex(index_path)
+
+    return content_index
 
 
 def collect_clonk_content_files(path):
-    global last_search_path
-    if last_search_path == path:
-        return
+    global found_content
+    global found_mesh_lookup
+    global found_action_lookup
+    path = str(path)
+    # Only folders that changed since the last search are listed again.
+    found_content = get_content_index().collect(path)
 
-    global found_meshes
-    global found_actions
-    global found_actionlists
     found_meshes.clear()
     found_actions.clear()
     found_actionlists.clear()
-    path = str(path)
-    # Note: This does not use recursion, because it might use an inordinate amount of time on large directories.
-    content_glob_search(path)
-    searching_path = os.path.join(path, "**")
-    content_glob_search(searching_path)
+    found_meshes.extend(record["Path"] for record in found_content.meshes)
+    found_actions.extend(record["Path"] for record in found_content.actions)
+    found_actionlists.extend(record["Path"] for record in found_content.actlists)
+    found_mesh_lookup = ContentIndex.ContentLookup(found_meshes)
+    found_action_lookup = ContentIndex.ContentLookup(found_actions, MetaData.action_map)
 
     print("Looking for Data.." + path)
 
 
-def _ImportExtraMesh(meshname, meshfiles, reuse_materials=True):
+def peek_content_folder(path):
+    # Lists the actions of a content folder (like collect_clonk_content_files finds them) without importing them.
+    # The found files of the last search stay as they are.
+    index = get_content_index()
+    action_records = []
+    for record in index.collect(str(path)).actions:
+        try:
+            action_records += AnimPort.peek_action_file(record["Path"], index.get_header(record))
+        except (OSError, ValueError) as Err:
+            print(f"Could not read {os.path.basename(record['Path'])}: {Err}")
+
+    index.save()
+    return action_records
+
+
+def get_library_names(path, data_types):
+    # Names of the datablocks inside of a blend file, without loading them.
+    try:
+        catalog = BlendLibrary.get_catalog(path)
+    except OSError as Err:
+        print(f"Could not read {os.path.basename(path)}: {Err}")
+        return []
+
+    return [name for data_type in data_types for name in catalog[data_type]]
+
+
+def get_library_actions(path):
+    return get_library_names(path, ["actions"])
+
+
+def get_library_objects(path):
+    return get_library_names(path, ["objects", "collections"])
+
+
+def _FindExtraMeshFile(meshname, mesh_lookup):
+    # Returns the file and the objects to import from it. The objects are None for whole files.
+    meshfilepath = mesh_lookup.find(meshname)
+    if meshfilepath:
+        return meshfilepath, None
+
+    # A tool inside of a bigger .meshblend file.
+    meshfilepath = mesh_lookup.find_contained(meshname, get_library_objects)
+    if meshfilepath:
+        return meshfilepath, [meshname]
+
+    return None, None
+
+
+def _ImportExtraMesh(meshname, mesh_lookup, reuse_materials=True):
     if bpy.data.objects.find(meshname) > -1:
         return [bpy.data.objects[meshname]]
 
-    for meshfilespath in meshfiles:
-        meshfile = Path(meshfilespath)
-        if meshfile.stem == meshname:
-            clonk_objects = MeshPort.import_mesh(meshfilespath, reuse_materials=reuse_materials)
-            new_objects = reuse_rigs_and_parent_objects(clonk_objects)
+    meshfilepath, object_names = _FindExtraMeshFile(meshname, mesh_lookup)
+    if meshfilepath:
+        clonk_objects = MeshPort.import_mesh(meshfilepath, reuse_materials=reuse_materials, object_names=object_names)
+        new_objects = reuse_rigs_and_parent_objects(clonk_objects)
 
-            return new_objects
+        return new_objects
 
     return []
 
 
-def _ImportToolsIfAnyLegacy(action_entry, animdata, meshfiles, reuse_materials=True):
+def _ImportExtraMeshesBatch(meshnames, mesh_lookup, reuse_materials=True):
+    # Imports the tools of many actions at once, so the mesh files are parsed in parallel.
+    # _ImportExtraMesh finds the objects afterwards.
+    meshpaths = []
+    # {path: [object names]} of tools inside of bigger .meshblend files
+    library_objects = {}
+    for meshname in meshnames:
+        if bpy.data.objects.find(meshname) > -1:
+            continue
+        meshfilepath, object_names = _FindExtraMeshFile(meshname, mesh_lookup)
+        if meshfilepath and object_names:
+            library_objects.setdefault(meshfilepath, []).extend(object_names)
+        elif meshfilepath:
+            meshpaths.append(meshfilepath)
+
+    imported_objects = MeshBatch.import_meshes(meshpaths, reuse_materials=reuse_materials)
+    for clonk_objects in imported_objects.values():
+        reuse_rigs_and_parent_objects(clonk_objects)
+
+    # Every library is opened once for all of its tools.
+    for meshfilepath, object_names in library_objects.items():
+        object_names = [object_name for object_name in dict.fromkeys(object_names) if bpy.data.objects.find(object_name) == -1]
+        if len(object_names) > 0:
+            reuse_rigs_and_parent_objects(MeshPort.import_mesh(meshfilepath, reuse_materials=reuse_materials, object_names=object_names))
+
+
+def _ImportToolsIfAnyLegacy(action_entry, animdata, mesh_lookup, reuse_materials=True):
     tool1 = []
     tool2 = []
     if animdata.get("Tool1"):
-        tool1 = _ImportExtraMesh(animdata["Tool1"], meshfiles, reuse_materials=reuse_materials)
+        tool1 = _ImportExtraMesh(animdata["Tool1"], mesh_lookup, reuse_materials=reuse_materials)
     if animdata.get("Tool2"):
-        tool2 = _ImportExtraMesh(animdata["Tool2"], meshfiles, reuse_materials=reuse_materials)
+        tool2 = _ImportExtraMesh(animdata["Tool2"], mesh_lookup, reuse_materials=reuse_materials)
 
     if action_entry == None:
         return
@@ -111,113 +196,238 @@ def _ImportToolsIfAnyLegacy(action_entry, animdata, meshfiles, reuse_materials=T
             action_entry.additional_object = tool2[0]
 
 
-def LoadAction(path, animation_target, force_import_action=False, import_tools=True, reuse_materials=True):
-    if ".animblend" in path or ".anim.blend" in path:
-
-        with bpy.data.libraries.load(path) as (data_from, data_to):
-            data_to.scenes = data_from.scenes
+def _RemoveTools(tool_objects, collections):
+    # Removes tools that were loaded with an .animblend file, but are not needed.
+    # Their meshes and materials can be shared with tools that are kept, so those are only removed once nothing uses them anymore.
+    meshes = []
+    materials = []
+    for tool in dict.fromkeys(tool_objects):
+        if tool:
+            if tool.type == "MESH":
+                meshes.append(tool.data)
+                materials += [material_slot.material for material_slot in tool.material_slots if material_slot.material]
 
-        for imported_entry in data_to.scenes[0].animlist:
-            new_entry = bpy.context.scene.animlist.add()
-
-            for key, value in imported_entry.items():
-                new_entry[key] = value
+            bpy.data.objects.remove(tool)
 
-            tool_objects, collection = MetaData.get_action_entry_tools(new_entry)
+    for collection in dict.fromkeys(collections):
+        if collection:
+            bpy.data.collections.remove(collection)
 
-            # These objects get implicitly imported when they are referenced inside an anim blend file.
-            if import_tools:
-                if collection and collection.name not in bpy.context.view_layer.layer_collection.collection.children:
-                    bpy.context.view_layer.layer_collection.collection.children.link(collection)
-                elif len(tool_objects) == 1 and tool_objects[0].name not in bpy.context.view_layer.layer_collection.collection.objects:
-                    bpy.context.view_layer.layer_collection.collection.objects.link(tool_objects[0])
+    for mesh in dict.fromkeys(meshes):
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+    for material in dict.fromkeys(materials):
+        if material.users == 0:
+            bpy.data.materials.remove(material)
 
-                if reuse_materials:
-                    MetaData.replace_duplicate_materials(tool_objects)
-                reuse_rigs_and_parent_objects(tool_objects)
 
-            # Remove them again
-            else:
-                for tool in tool_objects:
-                    if tool:
-                        if tool.type == "MESH":
-                            for material_slot in tool.material_slots:
-                                if material_slot.material:
-                                    bpy.data.materials.remove(material_slot.material)
+def LoadAction(path, animation_target, force_import_action=False, import_tools=True, reuse_materials=True, simplify_keys=False, lazy=False, parsed_anim_data=None, action_names=None,
+               pose_hash_actions=None):
+    # action_names: Only for .animblend files. The entries of these actions are imported, all entries if None.
+    if ".animblend" in path or ".anim.blend" in path:
+        # Only the animlist of the first scene is imported, other scenes of the library (e.g. helper scenes) aren't even loaded.
+        # The catalog is kept per file, so this only reads the library again if it changed.
+        requested = {"scenes": BlendLibrary.get_catalog(path)["scenes"][0:1]}
+        if action_names is not None:
+            requested["actions"] = action_names
+        # The library is opened once, no matter how many of its actions are imported.
+        loaded = BlendLibrary.load_datablocks(path, requested)
+        requested_actions = list(loaded["actions"].values()) if action_names is not None else None
+
+        kept_tools = set()
+        kept_actions = set()
+        removed_tools = []
+        removed_collections = []
+        skipped_actions = []
+        for scene in loaded["scenes"].values():
+            for imported_entry in scene.animlist:
+                tool_objects, collection = MetaData.get_action_entry_tools(imported_entry)
+
+                # The scene brings the data of all its entries, which is removed again for entries that were not asked for.
+                if requested_actions is not None and imported_entry.action not in requested_actions:
+                    skipped_actions.append(imported_entry.action)
+                    removed_tools += tool_objects
+                    removed_collections.append(collection)
+                    continue
+
+                new_entry = bpy.context.scene.animlist.add()
+                kept_actions.add(imported_entry.action)
+
+                for key, value in imported_entry.items():
+                    new_entry[key] = value
+
+                # These objects get implicitly imported when they are referenced inside an anim blend file.
+                if import_tools:
+                    if collection and collection.name not in bpy.context.view_layer.layer_collection.collection.children:
+                        bpy.context.view_layer.layer_collection.collection.children.link(collection)
+                    elif len(tool_objects) == 1 and tool_objects[0].name not in bpy.context.view_layer.layer_collection.collection.objects:
+                        bpy.context.view_layer.layer_collection.collection.objects.link(tool_objects[0])
+
+                    if reuse_materials:
+                        MetaData.replace_duplicate_materials(tool_objects)
+                    reuse_rigs_and_parent_objects(tool_objects)
+                    kept_tools.update(tool_objects)
+                    kept_tools.add(collection)
+
+                # Remove them again
+                else:
+                    removed_tools += tool_objects
+                    removed_collections.append(collection)
 
-                        bpy.data.objects.remove(tool)
-                        if collection:
-                            bpy.data.collections.remove(collection)
+        for scene in loaded["scenes"].values():
+            bpy.data.scenes.remove(scene)
 
-        bpy.data.scenes.remove(data_to.scenes[0])
+        # Actions of entries that were not asked for, as well as asked for actions that have no entry in the library.
+        for action in dict.fromkeys(skipped_actions + (requested_actions or [])):
+            if action and action not in kept_actions:
+                bpy.data.actions.remove(action)
+        _RemoveTools([tool for tool in removed_tools if tool not in kept_tools],
+                     [collection for collection in removed_collections if collection not in kept_tools])
 
         return None
 
     # Legacy action load
     else:
-        anim_data = AnimPort.LoadActionLegacy(path, animation_target, force_import_action)
+        anim_data = AnimPort.LoadActionLegacy(path, animation_target, force_import_action, simplify_keys, lazy, parsed_anim_data, pose_hash_actions)
 
         # Update old action names
-        current_action_name = anim_data["Action"].name
-        if current_action_name.lower() in MetaData.action_map:
-            anim_data["Action"].name = MetaData.action_map[current_action_name.lower()]
+        if anim_data.get("AlternativeName"):
+            # The action belongs to another entry as well, so only the name of this entry changes.
+            alternative_name = anim_data["AlternativeName"]
+            if alternative_name.lower() in MetaData.action_map:
+                anim_data["AlternativeName"] = MetaData.action_map[alternative_name.lower()]
+        else:
+            current_action_name = anim_data["Action"].name
+            if current_action_name.lower() in MetaData.action_map:
+                anim_data["Action"].name = MetaData.action_map[current_action_name.lower()]
 
         return anim_data
 
 
-def get_animfilemap(animfiles):
-    animfilemap = {}
-    for animfilepath in animfiles:
-        animpath = Path(animfilepath)
+def resolve_action_files(action_names, action_lookup):
+    # Returns [[path, action names]] and the names of the actions that could not be found.
+    # Every .animblend file is only listed once with all of its actions that are needed. The action names are None for whole files.
+    print("Looking in " + str(action_lookup.get_file_count()) + " animfiles")
+    action_requests = []
+    library_requests = {}
+    animations_not_found = []
 
-        # Prioritize blend files
-        if animpath.stem in animfilemap and "blend" not in animpath.suffix:
-            pass
-        else:
-            animfilemap[animpath.stem] = animfilepath
+    for action in action_names:
+        action_path = action_lookup.find(action)
+        library_action_name = None
+        if action_path == None:
+            # Libraries are only looked into if no file has the name of the action.
+            library_action_name = MetaData.action_map.get(action.lower())
+            if library_action_name:
+                action_path = action_lookup.find_contained(library_action_name, get_library_actions)
+            if action_path == None:
+                library_action_name = action
+                action_path = action_lookup.find_contained(action, get_library_actions)
+
+        if action_path == None:
+            animations_not_found.append(action)
+        elif ContentIndex.is_blend_file(action_path) == False:
+            action_requests.append([action_path, None])
+        elif action_path not in library_requests:
+            library_requests[action_path] = [action_path, None if library_action_name is None else [library_action_name]]
+            action_requests.append(library_requests[action_path])
+        elif library_requests[action_path][1] is not None:
+            if library_action_name is None:
+                library_requests[action_path][1] = None
+            else:
+                library_requests[action_path][1].append(library_action_name)
 
-    return animfilemap
+    return action_requests, animations_not_found
 
 
-def import_actions_multi(action_names, animfiles, meshfiles, target, create_entry, import_tools, reuse_materials=True):
-    print("Looking in " + str(len(animfiles)) + " animfiles")
-    animfilemap = get_animfilemap(animfiles)
-    animations_not_found = []
-    animations_found = 0
+def make_import_report(animations_found, animations_not_found):
+    return {"Found": animations_found, "NotFound": animations_not_found, "LegacyImports": [], "RemovedKeys": 0, "MissingBones": set(),
+            # Shared by all files of the import, see AnimPort.get_pose_hash_actions
+            "PoseHashActions": AnimPort.get_pose_hash_actions()}
 
-    for action in action_names:
-    # Look for updated file or name change.
-        if action.lower() in MetaData.action_map:
-            name_replacement = MetaData.action_map[action.lower()]
-            if animfilemap.get(name_replacement) != None:
-                action = name_replacement
 
-        if animfilemap.get(action) != None:
-            anim_data = LoadAction(animfilemap[action], target, import_tools=import_tools, reuse_materials=reuse_materials)
-            animations_found += 1
+def import_listed_action(path, import_report, target, create_entry, import_tools, reuse_materials=True, simplify_keys=False, lazy=False, parsed_anim_data=None, action_names=None):
+    anim_data = LoadAction(path, target, import_tools=import_tools, reuse_materials=reuse_materials,
+                           simplify_keys=simplify_keys, lazy=lazy, parsed_anim_data=parsed_anim_data, action_names=action_names,
+                           pose_hash_actions=import_report["PoseHashActions"])
 
-            if anim_data: # Legacy import
-                new_entry = None
-                if create_entry:
-                    new_entry = MetaData.MakeActionEntry(anim_data)
-                if import_tools:
-                    _ImportToolsIfAnyLegacy(new_entry, anim_data, meshfiles, reuse_materials=reuse_materials)
+    if anim_data: # Legacy import
+        import_report["RemovedKeys"] += anim_data.get("RemovedKeys", 0)
+        import_report["MissingBones"].update(anim_data.get("MissingBones", []))
+        new_entry = None
+        if create_entry:
+            new_entry = MetaData.MakeActionEntry(anim_data)
+        import_report["LegacyImports"].append([new_entry, anim_data])
 
-        else:
-            animations_not_found.append(action)
 
-    if animations_found == 0:
+def finish_listed_actions(import_report, mesh_lookup, import_tools, reuse_materials=True, simplify_keys=False):
+    legacy_imports = import_report["LegacyImports"]
+    if import_tools and len(legacy_imports) > 0:
+        tool_names = [anim_data[tool] for new_entry, anim_data in legacy_imports for tool in ["Tool1", "Tool2"] if anim_data.get(tool)]
+        _ImportExtraMeshesBatch(tool_names, mesh_lookup, reuse_materials=reuse_materials)
+        for new_entry, anim_data in legacy_imports:
+            _ImportToolsIfAnyLegacy(new_entry, anim_data, mesh_lookup, reuse_materials=reuse_materials)
+
+    report_details = ""
+    if simplify_keys:
+        report_details = f" Removed {import_report['RemovedKeys']} redundant keys."
+    if len(import_report["MissingBones"]) > 0:
+        report_details += f" Bones not found on the armature: {', '.join(sorted(import_report['MissingBones']))}"
+
+    if import_report["Found"] == 0:
         return "WARNING", "No actions could be found."
-    if len(animations_not_found) > 0:
+    if len(import_report["NotFound"]) > 0:
         missing_actions = ""
-        for animation in animations_not_found:
+        for animation in import_report["NotFound"]:
             missing_actions += animation + ", "
-        return "WARNING", f"Imported {animations_found} actions. Omitted: {missing_actions}"
+        return "WARNING", f"Imported {import_report['Found']} actions. Omitted: {missing_actions}{report_details}"
     else:
-        return "INFO", "Imported all actions from file."
+        return "INFO", "Imported all actions from file." + report_details
+
+
+def import_actions_background(action_requests, import_report, mesh_lookup, target, create_entry, import_tools, reuse_materials=True, simplify_keys=False, lazy=False):
+    action_paths = [path for path, action_names in action_requests]
+    # Only .animblend files have action names, which are listed once per file.
+    library_action_names = {path: action_names for path, action_names in action_requests}
+    # Actions that exist already only need their header, just like lazy imports. Everything else is parsed by workers.
+    parse_paths = []
+    if lazy == False:
+        parse_paths = [path for path in action_paths
+                       if ContentIndex.is_blend_file(path) == False and bpy.data.actions.find(Path(path).stem) == -1]
+
+    def apply_action(path, parsed_anim_data):
+        import_listed_action(path, import_report, target, create_entry, import_tools, reuse_materials, simplify_keys, lazy, parsed_anim_data,
+                             library_action_names[path])
+
+    def finish(was_cancelled):
+        messagetype, message = finish_listed_actions(import_report, mesh_lookup, import_tools, reuse_materials, simplify_keys)
+        if was_cancelled:
+            messagetype, message = "INFO", f"Action import cancelled after {len(import_report['LegacyImports'])} actions."
+        print(f"{messagetype}: {message}")
+        # Shown in the panel, because the operator that started the import has returned long ago.
+        return messagetype, message
+
+    ActionBatch.start_batch(action_paths, apply_action, finish, parse_paths)
+    return "INFO", f"Importing {import_report['Found']} actions in the background."
 
 
-def ImportActList(path, animfiles, meshfiles, target, create_entry, import_tools, reuse_materials=True):
+def import_actions_multi(action_names, action_lookup, mesh_lookup, target, create_entry, import_tools, reuse_materials=True, simplify_keys=False, lazy=False, background=False):
+    action_requests, animations_not_found = resolve_action_files(action_names, action_lookup)
+    import_report = make_import_report(len(action_names) - len(animations_not_found), animations_not_found)
+
+    if background and len(action_requests) > 0:
+        if ActionBatch.is_running():
+            return "ERROR", "Another action import is still running."
+        return import_actions_background(action_requests, import_report, mesh_lookup, target, create_entry, import_tools, reuse_materials, simplify_keys, lazy)
+
+    for path, library_action_names in action_requests:
+        import_listed_action(path, import_report, target, create_entry, import_tools, reuse_materials, simplify_keys, lazy,
+                             action_names=library_action_names)
+
+    return finish_listed_actions(import_report, mesh_lookup, import_tools, reuse_materials, simplify_keys)
+
+
+def ImportActList(path, action_lookup, mesh_lookup, target, create_entry, import_tools, reuse_materials=True, simplify_keys=False, lazy=False, background=False):
     print("Read act " + path)
     file = open(path, "r")
     lines = file.readlines()
@@ -237,13 +447,13 @@ def ImportActList(path, animfiles, meshfiles, target, create_entry, import_tools
 
     file.close()
 
-    message_type, message = import_actions_multi(action_names, animfiles, meshfiles, target, create_entry, import_tools, reuse_materials)
+    message_type, message = import_actions_multi(action_names, action_lookup, mesh_lookup, target, create_entry, import_tools, reuse_materials, simplify_keys, lazy, background)
 
     return message_type, message
 
 
 # ActMap.txt
-def ImportActMap(path, animfiles, meshfiles, target, create_entry, import_tools, reuse_materials=True):
+def ImportActMap(path, action_lookup, mesh_lookup, target, create_entry, import_tools, reuse_materials=True, simplify_keys=False, lazy=False, background=False):
     print("Read actmap " + path)
     file = open(path, "r")
     actmap, messagetype, message = IniPort.Read(path)
@@ -257,7 +467,7 @@ def ImportActMap(path, animfiles, meshfiles, target, create_entry, import_tools,
 
     file.close()
 
-    message_type, message = import_actions_multi(action_names, animfiles, meshfiles, target, create_entry, import_tools, reuse_materials)
+    message_type, message = import_actions_multi(action_names, action_lookup, mesh_lookup, target, create_entry, import_tools, reuse_materials, simplify_keys, lazy, background)
     
     return message_type, message
 
@@ -503,6 +713,9 @@ class OT_MeshFilebrowser(bpy.types.Operator, ImportHelper):
     bl_options = {'UNDO'}
 
     filter_glob: StringProperty(default="*.mesh*", options={"HIDDEN"})
+    # Several files can be selected at once. They are imported in parallel then.
+    files: CollectionProperty(type=bpy.types.OperatorFileListElement, options={"HIDDEN", "SKIP_SAVE"})
+    directory: StringProperty(subtype="DIR_PATH", options={"HIDDEN"})
 
     parent_to_existing_rigs: BoolProperty(name="Parent to existing rigs", default=True,
                                       description="This will parent the objects to existing (matching) rigs (anim targets) and apply an Armature Modifier (if necessary)")
@@ -510,9 +723,29 @@ class OT_MeshFilebrowser(bpy.types.Operator, ImportHelper):
     reuse_materials: BoolProperty(name="Reuse materials", default=True,
                                    description="Decide whether to search for existing materials and replace imported ones.")
 
+    _timer = None
+    batch: MeshBatch.MeshBatch = None
+
+    def get_insert_collection(self):
+        if self.parent_to_existing_rigs and bpy.context.scene.always_rendered_objects != None:
+            return bpy.context.scene.always_rendered_objects
+        return None
+
     def execute(self, context):
         print(self.filepath)
 
+        filepaths = [os.path.join(self.directory, file.name) for file in self.files if ".mesh" in file.name]
+        if len(filepaths) > 1:
+            self.batch = MeshBatch.MeshBatch(filepaths, self.get_insert_collection(), self.reuse_materials)
+            self.batch.start()
+
+            wm = context.window_manager
+            wm.progress_begin(0, self.batch.get_total())
+            self._timer = wm.event_timer_add(0.05, window=context.window)
+            wm.modal_handler_add(self)
+            context.scene.lastfilepath = self.filepath
+            return {"RUNNING_MODAL"}
+
         if ".mesh" in self.filepath:
             if self.parent_to_existing_rigs:
                 collection: bpy.types.Collection = None
@@ -529,6 +762,37 @@ class OT_MeshFilebrowser(bpy.types.Operator, ImportHelper):
         context.scene.lastfilepath = self.filepath
         return {'FINISHED'}
 
+    def modal(self, context, event):
+        if event.type in {"ESC"}:
+            self.report({"WARNING"}, f"Mesh import cancelled after {self.batch.finished_count} of {self.batch.get_total()} files.")
+            self.batch.cancel()
+            self.finish(context)
+            return {"CANCELLED"}
+
+        if event.type == "TIMER":
+            # A few objects per tick, so blender stays responsive.
+            self.batch.build_ready(4)
+            context.window_manager.progress_update(self.batch.finished_count)
+            context.workspace.status_text_set(
+                f"Importing meshes {self.batch.finished_count}/{self.batch.get_total()} (Press escape to cancel)")
+
+            if self.batch.is_finished():
+                if self.parent_to_existing_rigs:
+                    for clonk_objects in self.batch.imported_objects.values():
+                        reuse_rigs_and_parent_objects(clonk_objects)
+                self.report({"INFO"}, f"Imported {self.batch.get_total()} mesh files.")
+                self.finish(context)
+                return {"FINISHED"}
+
+        return {"PASS_THROUGH"}
+
+    def finish(self, context):
+        self.batch.shutdown()
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
 
 def GetSelectedObjects(context):
     active_object = None
@@ -641,6 +905,11 @@ class OT_AnimFilebrowser(bpy.types.Operator, ImportHelper):
 
     filter_glob: StringProperty(default="*.anim*", options={"HIDDEN"})
 
+    @classmethod
+    def poll(cls, context):
+        # The background import adds action entries as well.
+        return ActionBatch.is_running() == False
+
     force_import_action: BoolProperty(name="Force action import", default=False, 
                                       description="Import action although there is an action with the same name in blender", options={"HIDDEN"})
     import_tools: BoolProperty(name="Import Tool Objects", default=True,
@@ -648,6 +917,8 @@ class OT_AnimFilebrowser(bpy.types.Operator, ImportHelper):
     
     reuse_materials_on_tools: BoolProperty(name="Reuse tool materials", default=True,
                                    description="Decide whether to search for existing materials and replace imported ones.")
+    simplify_keys: BoolProperty(name="Simplify keyframes", default=False,
+                                   description="Leave out keys of channels that don't change and keys in between linear motion. The rendered result stays the same")
 
     def execute(self, context):
         print(self.filepath)
@@ -660,20 +931,25 @@ class OT_AnimFilebrowser(bpy.types.Operator, ImportHelper):
                 return {"CANCELLED"}
 
             anim_data = LoadAction(
-                self.filepath, clonk_rig, self.force_import_action, import_tools=self.import_tools, reuse_materials=self.reuse_materials_on_tools)
+                self.filepath, clonk_rig, self.force_import_action, import_tools=self.import_tools, reuse_materials=self.reuse_materials_on_tools,
+                simplify_keys=self.simplify_keys)
             
             if anim_data: # Legacy import
                 new_entry = MetaData.MakeActionEntry(anim_data)
                 if self.import_tools:
                     parent_path = Path(self.filepath).parents[1]
                     collect_clonk_content_files(parent_path)
-                    global found_meshes
-                    _ImportToolsIfAnyLegacy(new_entry, anim_data, found_meshes, reuse_materials=self.reuse_materials_on_tools)
+                    _ImportToolsIfAnyLegacy(new_entry, anim_data, found_mesh_lookup, reuse_materials=self.reuse_materials_on_tools)
 
                 if anim_data.get("ERROR"):
                     self.report({"ERROR"}, f"" + anim_data["ERROR"])
                     return {"CANCELLED"}
 
+                if anim_data.get("RemovedKeys") != None:
+                    self.report({"INFO"}, f"Removed {anim_data['RemovedKeys']} redundant keys.")
+                if anim_data.get("MissingBones"):
+                    self.report({"WARNING"}, f"Bones not found on the armature: {', '.join(anim_data['MissingBones'])}")
+
         else:
             print(self.filepath + " is no Animation!")
 
@@ -688,6 +964,11 @@ def export_action(filepath, context, export_all_enabled=False):
     export_collection = bpy.data.collections.new(name=filename)
 
     try:
+        if export_all_enabled:
+            AnimPort.materialize_action_entries(MetaData.GetValidActionEntries())
+        else:
+            AnimPort.materialize_action_entries([context.scene.animlist[context.scene.action_meta_data_index]])
+
         for anim_target in MetaData.get_anim_targets():
             if anim_target:
                 if anim_target.animation_data:
@@ -736,6 +1017,10 @@ class OT_AnimExport(bpy.types.Operator):
 
     @classmethod
     def poll(cls, context):
+        # The action list changes while actions are imported in the background.
+        if ActionBatch.is_running():
+            return False
+
         action_name = MetaData.GetActionNameFromIndex(
             bpy.context.scene.action_meta_data_index)
 
@@ -791,6 +1076,10 @@ class OT_ExportAnimFilebrowser(bpy.types.Operator, ExportHelper):
     export_all_enabled: BoolProperty(name="Export all enabled actions", default=False,
                                    description="Exports multiple actionsin one file")
 
+    @classmethod
+    def poll(cls, context):
+        return OT_AnimExport.poll(context)
+
     def execute(self, context):
         print(self.filepath)
         modular_filepath = Path(self.filepath)
@@ -817,6 +1106,92 @@ class OT_ExportAnimFilebrowser(bpy.types.Operator, ExportHelper):
         return {'FINISHED'}
 
 
+def get_legacy_anim_header(action_entry):
+    header = {
+        "Width": action_entry.width,
+        "Height": action_entry.height,
+        "Length": action_entry.max_frames,
+    }
+
+    # Tools are named after their mesh. The vertex group mapping tells which tool slot they use.
+    tool_objects, collection = MetaData.get_action_entry_tools(action_entry)
+    for tool in tool_objects:
+        if tool is None or tool.type != "MESH":
+            continue
+        tool_slot = MetaData.get_vgroup_mapping(tool.name)
+        if tool_slot not in ["Tool1", "Tool2"] or tool_slot in header:
+            tool_slot = "Tool1" if "Tool1" not in header else "Tool2"
+        if tool_slot not in header:
+            header[tool_slot] = tool.name
+
+    return header
+
+
+def export_action_legacy(filepath, action_entry):
+    armature_ob = None
+    for anim_target in MetaData.get_anim_targets():
+        if anim_target and anim_target.type == "ARMATURE":
+            armature_ob = anim_target
+            break
+
+    if armature_ob is None:
+        return AssertionError("No armature found in the anim targets.")
+
+    try:
+        AnimPort.materialize_action_entries([action_entry])
+        AnimPort.SaveActionLegacy(filepath, action_entry.action, armature_ob, action_entry.start_frame,
+                                  action_entry.start_frame + action_entry.max_frames - 1, get_legacy_anim_header(action_entry))
+    except BaseException as Err:
+        return Err
+
+
+def export_actions_legacy(filepath, context, export_all_enabled=False):
+    # Returns the number of exported actions and an error, if there was one.
+    if export_all_enabled == False:
+        action_entry = context.scene.animlist[context.scene.action_meta_data_index]
+        return 1, export_action_legacy(filepath, action_entry)
+
+    # Each action gets its own file in the same folder.
+    directory = os.path.dirname(filepath)
+    action_count = 0
+    for action_entry in context.scene.animlist:
+        if action_entry.is_used == False or action_entry.action is None:
+            continue
+
+        Err = export_action_legacy(os.path.join(directory, f"{MetaData.GetActionName(action_entry)}.anim"), action_entry)
+        if Err is not None:
+            return action_count, Err
+        action_count += 1
+
+    return action_count, None
+
+
+class OT_ExportLegacyAnimFilebrowser(bpy.types.Operator, ExportHelper):
+    bl_idname = "anim.open_legacyexportfilebrowser"
+    bl_label = "Export Action (.anim)"
+
+    filter_glob: StringProperty(default="*.anim", options={"HIDDEN"})
+    filename_ext: StringProperty(default=".anim", options={"HIDDEN"})
+
+    export_all_enabled: BoolProperty(name="Export all enabled actions", default=False,
+                                   description="Exports every enabled action into its own file next to the chosen file")
+
+    @classmethod
+    def poll(cls, context):
+        return OT_AnimExport.poll(context)
+
+    def execute(self, context):
+        print(self.filepath)
+        action_count, Err = export_actions_legacy(self.filepath, context, export_all_enabled=self.export_all_enabled)
+
+        if Err is not None:
+            self.report({"ERROR"}, f"{Err}")
+            return {"CANCELLED"}
+
+        self.report({"INFO"}, f"Exported {action_count} action(s) successfully as .anim")
+        return {'FINISHED'}
+
+
 class OT_PictureFilebrowser(bpy.types.Operator, ImportHelper):
     bl_idname = "picture.open_filebrowser"
     bl_label = "Load image"
@@ -870,6 +1245,12 @@ class OT_ActListFilebrowser(bpy.types.Operator, ImportHelper):
                                    description="Import tool meshes if the actions reference any")
     reuse_materials_on_tools: BoolProperty(name="Reuse tool materials", default=True,
                                    description="Decide whether to search for existing materials and replace imported ones.")
+    simplify_keys: BoolProperty(name="Simplify keyframes", default=False,
+                                   description="Leave out keys of channels that don't change and keys in between linear motion. The rendered result stays the same")
+    lazy_import: BoolProperty(name="Load actions on first use", default=False,
+                                   description="Only read the action headers now. The keyframes of an action are loaded when it is previewed, rendered or exported the first time")
+    background_import: BoolProperty(name="Import in background", default=False,
+                                   description="Read the action files in other processes and add the actions a few at a time, so blender can be used in the meantime")
 
     def execute(self, context):
         parent_path = Path(self.filepath).parents[1]
@@ -878,15 +1259,14 @@ class OT_ActListFilebrowser(bpy.types.Operator, ImportHelper):
 
         extension = Path(self.filepath).suffix
         if extension == ".act":
-            global found_actions
-            global found_meshes
             clonk_rig = GetOrAppendClonkRig()
             bpy.context.scene.anim_target = clonk_rig
             if bpy.data.collections.find("ClonkRig") == -1:
                 raise AssertionError("No Collection named ClonkRig found.")
             bpy.context.scene.always_rendered_objects = bpy.data.collections["ClonkRig"]
-            reporttype, message = ImportActList(self.filepath, found_actions, found_meshes,
-                                                bpy.context.scene.anim_target, True, self.import_tool_mesh, reuse_materials=self.reuse_materials_on_tools)
+            reporttype, message = ImportActList(self.filepath, found_action_lookup, found_mesh_lookup,
+                                                bpy.context.scene.anim_target, True, self.import_tool_mesh, reuse_materials=self.reuse_materials_on_tools,
+                                                simplify_keys=self.simplify_keys, lazy=self.lazy_import, background=self.background_import)
 
             self.report({reporttype}, "%s" % (message))
 
@@ -908,6 +1288,12 @@ class OT_ActMapFilebrowser(bpy.types.Operator, ImportHelper):
                                    description="Import tool meshes if the actions reference any")
     reuse_materials_on_tools: BoolProperty(name="Reuse tool materials", default=True,
                                    description="Decide whether to search for existing materials and replace imported ones.")
+    simplify_keys: BoolProperty(name="Simplify keyframes", default=False,
+                                   description="Leave out keys of channels that don't change and keys in between linear motion. The rendered result stays the same")
+    lazy_import: BoolProperty(name="Load actions on first use", default=False,
+                                   description="Only read the action headers now. The keyframes of an action are loaded when it is previewed, rendered or exported the first time")
+    background_import: BoolProperty(name="Import in background", default=False,
+                                   description="Read the action files in other processes and add the actions a few at a time, so blender can be used in the meantime")
 
     def execute(self, context):
         extension = Path(self.filepath).name
@@ -927,8 +1313,9 @@ class OT_ActMapFilebrowser(bpy.types.Operator, ImportHelper):
                     {"ERROR"}, "Your ActMap.txt needs to be in the same folder (or neighboring folders) as your .anim files.")
                 return {"CANCELLED"}
 
-            reporttype, message = ImportActMap(self.filepath, found_actions, found_meshes,
-                                               bpy.context.scene.anim_target, True, self.import_tool_mesh, reuse_materials=self.reuse_materials_on_tools)
+            reporttype, message = ImportActMap(self.filepath, found_action_lookup, found_mesh_lookup,
+                                               bpy.context.scene.anim_target, True, self.import_tool_mesh, reuse_materials=self.reuse_materials_on_tools,
+                                               simplify_keys=self.simplify_keys, lazy=self.lazy_import, background=self.background_import)
 
             self.report({reporttype}, f"{message}")
 
@@ -941,6 +1328,32 @@ class OT_ActMapFilebrowser(bpy.types.Operator, ImportHelper):
         return {"FINISHED"}
 
 
+class OT_CancelActionImport(bpy.types.Operator):
+    bl_idname = "act.cancel_background_import"
+    bl_label = "Cancel Action Import"
+    bl_description = "Stop importing actions in the background. Actions that are imported already stay"
+
+    @classmethod
+    def poll(cls, context):
+        return ActionBatch.is_running()
+
+    def execute(self, context):
+        imported_count = ActionBatch.current_batch.finished_count
+        ActionBatch.cancel_batch()
+        self.report({"INFO"}, f"Cancelled action import after {imported_count} actions.")
+        return {"FINISHED"}
+
+
+class OT_DismissActionImportReport(bpy.types.Operator):
+    bl_idname = "act.dismiss_background_import_report"
+    bl_label = "Dismiss Action Import Report"
+    bl_description = "Hide the result of the last background action import"
+
+    def execute(self, context):
+        ActionBatch.dismiss_report()
+        return {"FINISHED"}
+
+
 def DoesActmapExist():
     path = os.path.join(PathUtilities.GetOutputPath(), "ActMap.txt")
     return os.path.exists(path)
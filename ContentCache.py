@@ -0,0 +1,163 @@
+# --------------------------
+# ContentCache: Binary cache for parsed content files, so they don't have to be parsed again.
+# 18.10.2026
+# --------------------------
+
+import bpy
+import os
+import json
+import hashlib
+import numpy as np
+
+from . import PathUtilities
+
+# {name: ArrayCache}, one per kind of content file
+array_caches = {}
+
+
+def get_cache(name, version):
+    # Returns None if the content cache is turned off. name is also the folder of the cache, e.g. "Meshes".
+    addon_prefs = bpy.context.preferences.addons[__package__].preferences
+    if addon_prefs.use_content_cache == False:
+        return None
+
+    cache = array_caches.get(name)
+    if cache is None or cache.version != version:
+        cache = ArrayCache(name, PathUtilities.GetCachePath(name), 0, version)
+        array_caches[name] = cache
+    cache.size_limit = addon_prefs.cache_size_limit * 1024 * 1024
+
+    return cache
+
+
+def pack_records(arrays):
+    # Values that are no arrays (like dicts of names) are stored as JSON in a unicode array, so they can be loaded without pickle.
+    packed = {}
+    record_keys = []
+    for key, value in arrays.items():
+        if isinstance(value, np.ndarray):
+            packed[key] = value
+        else:
+            packed[key] = np.array(json.dumps(value))
+            record_keys.append(key)
+
+    packed["_record_keys"] = np.array(record_keys, dtype=str)
+    return packed
+
+
+def unpack_records(entry):
+    record_keys = entry["_record_keys"].tolist()
+    return {key: json.loads(str(entry[key])) if key in record_keys else entry[key]
+            for key in entry.files if key.startswith("_") == False}
+
+
+def get_file_hash(path):
+    file_hash = hashlib.sha1()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+class ArrayCache:
+    """Stores arrays and records per source file as .npz in a size limited directory. Least recently used entries are removed first."""
+
+    def __init__(self, name, directory, size_limit, version):
+        # version: Increase it whenever the layout of the cached arrays changes. Old entries will be ignored then.
+        self.name = name
+        self.directory = directory
+        self.size_limit = size_limit
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def get_entry_path(self, path):
+        key = f"{os.path.normcase(os.path.abspath(path))}|{self.version}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npz")
+
+    def print_stats(self, path, is_hit):
+        result = "hit" if is_hit else "miss"
+        print(f"{self.name} cache {result} for {os.path.basename(path)} ({self.hits} hits, {self.misses} misses)")
+
+    def load(self, path):
+        entry_path = self.get_entry_path(path)
+        arrays = None
+        try:
+            if os.path.exists(entry_path):
+                source_stat = os.stat(path)
+                with np.load(entry_path, allow_pickle=False) as entry:
+                    size, mtime = entry["_source_size"], entry["_source_mtime"]
+                    is_valid = size == source_stat.st_size and mtime == source_stat.st_mtime_ns
+                    # The file might just have been touched or copied, so the content decides.
+                    if is_valid == False and size == source_stat.st_size:
+                        is_valid = str(entry["_source_hash"]) == get_file_hash(path)
+
+                    if is_valid:
+                        arrays = unpack_records(entry)
+
+        except (OSError, ValueError, KeyError) as Err:
+            print(f"Could not read {self.name} cache entry of {os.path.basename(path)}: {Err}")
+            arrays = None
+
+        if arrays is None:
+            self.misses += 1
+            self.print_stats(path, False)
+            return None
+
+        # Mark as recently used. A read-only entry is still valid, it is just removed earlier.
+        try:
+            os.utime(entry_path)
+        except OSError as Err:
+            print(f"Could not mark {self.name} cache entry of {os.path.basename(path)} as used: {Err}")
+
+        self.hits += 1
+        self.print_stats(path, True)
+        return arrays
+
+    def store(self, path, arrays):
+        entry_path = self.get_entry_path(path)
+        temp_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            source_stat = os.stat(path)
+            with open(temp_path, "wb") as file:
+                np.savez(file, _source_size=source_stat.st_size, _source_mtime=source_stat.st_mtime_ns,
+                         _source_hash=get_file_hash(path), **pack_records(arrays))
+            os.replace(temp_path, entry_path)
+
+        except OSError as Err:
+            print(f"Could not write {self.name} cache entry of {os.path.basename(path)}: {Err}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        # The entry is written already, so a failed eviction only leaves the cache bigger for now.
+        try:
+            self.evict()
+        except OSError as Err:
+            print(f"Could not clean up {self.name} cache: {Err}")
+
+    def evict(self):
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as directory_entries:
+            for entry in directory_entries:
+                # Another blender instance that shares the cache folder might remove entries at the same time.
+                try:
+                    if entry.is_file() and entry.name.endswith(".npz"):
+                        entry_stat = entry.stat()
+                        entries.append((entry_stat.st_mtime, entry_stat.st_size, entry.path))
+                        total_size += entry_stat.st_size
+                except OSError:
+                    continue
+
+        entries.sort()
+        for mtime, size, entry_path in entries:
+            if total_size <= self.size_limit:
+                break
+            try:
+                os.remove(entry_path)
+                total_size -= size
+            except OSError:
+                pass
@@ -0,0 +1,270 @@
+# --------------------------
+# ContentIndex: Remembers the content files of searched folders as JSON, so only folders that changed are listed again.
+# 18.10.2026
+# --------------------------
+
+import os
+import json
+
+from . import AnimParser
+
+# Increase this whenever the layout of the index changes. Old indexes will be ignored then.
+INDEX_VERSION = 4
+
+
+def get_content_kind(name):
+    # Same file names the content search always used (*.mesh*, *.anim*, *.act), but without a pattern match per kind.
+    # Like glob, hidden files are left out.
+    if name.startswith("."):
+        return None
+
+    name = os.path.normcase(name)
+    if ".mesh" in name:
+        return "Mesh"
+    if ".anim" in name:
+        return "Action"
+    extension = name[name.rfind("."):]
+    if extension == ".act":
+        return "ActionList"
+
+    return None
+
+
+def is_blend_file(path):
+    # .meshblend, .animblend, .mesh.blend, .anim.blend. All other content files are legacy files.
+    return "blend" in os.path.splitext(path)[1]
+
+
+def read_header(path, kind):
+    # Only legacy actions have a header that can be read without blender.
+    if kind != "Action" or is_blend_file(path):
+        return {}
+    try:
+        return AnimParser.read_anim_header(path)
+    except (OSError, ValueError) as Err:
+        print(f"Could not read header of {os.path.basename(path)}: {Err}")
+        return {}
+
+
+def get_content_stem(name):
+    # "Walk.anim.blend" has the same name as "Walk.anim" and "Walk.animblend".
+    for blend_extension in [".anim.blend", ".mesh.blend"]:
+        if name.lower().endswith(blend_extension):
+            return name[0:-len(blend_extension)]
+
+    return os.path.splitext(name)[0]
+
+
+def make_record(path, name, kind, file_stat):
+    return {
+        "Path": path,
+        "Stem": get_content_stem(name),
+        "Kind": kind,
+        "Size": file_stat.st_size,
+        "Mtime": file_stat.st_mtime_ns,
+        # Read with the first get_header, so a search doesn't have to open every file.
+        "Header": None,
+    }
+
+
+class ContentScan:
+    """Content files of one search folder, sorted by kind. Every file is a record, see make_record."""
+
+    def __init__(self):
+        self.meshes = []
+        self.actions = []
+        self.actlists = []
+
+    def add(self, record):
+        if record["Kind"] == "Mesh":
+            self.meshes.append(record)
+        elif record["Kind"] == "Action":
+            self.actions.append(record)
+        elif record["Kind"] == "ActionList":
+            self.actlists.append(record)
+
+
+class ContentIndex:
+    """Content files per folder. A folder is only listed again if its mtime changed, which happens when files are added, removed or renamed."""
+
+    def __init__(self, index_path=None):
+        # Without index_path, the index is only kept in memory.
+        self.index_path = index_path
+        # {directory: {"Mtime": int, "Directories": [subdirectory names], "Files": {file name: record}}}
+        self.directories = {}
+        self.is_loaded = False
+        self.is_changed = False
+
+    def load(self):
+        self.is_loaded = True
+        if self.index_path is None or os.path.exists(self.index_path) == False:
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as file:
+                index = json.load(file)
+            if index.get("Version") == INDEX_VERSION:
+                self.directories = index["Directories"]
+
+        except (OSError, ValueError, KeyError) as Err:
+            print(f"Could not read content index: {Err}")
+            self.directories = {}
+
+    def save(self):
+        if self.index_path is None or self.is_changed == False:
+            return
+
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump({"Version": INDEX_VERSION, "Directories": self.directories}, file)
+            os.replace(temp_path, self.index_path)
+            self.is_changed = False
+
+        except OSError as Err:
+            print(f"Could not write content index: {Err}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def scan_directory(self, directory):
+        # Returns the index entry of the directory or None if it doesn't exist (anymore).
+        old_entry = self.directories.get(directory)
+        try:
+            directory_mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            if old_entry is not None:
+                del self.directories[directory]
+                self.is_changed = True
+            return None
+
+        if old_entry is not None and old_entry["Mtime"] == directory_mtime:
+            return old_entry
+
+        old_files = old_entry["Files"] if old_entry else {}
+        entry = {"Mtime": directory_mtime, "Directories": [], "Files": {}}
+        try:
+            with os.scandir(directory) as directory_entries:
+                for directory_entry in directory_entries:
+                    self.add_directory_entry(entry, directory_entry, old_files)
+        except OSError as Err:
+            # A folder that can't be read is treated as empty, just like glob does. It isn't kept, so it is read again next time.
+            print(f"Could not look for content in {directory}: {Err}")
+            if old_entry is not None:
+                del self.directories[directory]
+                self.is_changed = True
+            return {"Mtime": directory_mtime, "Directories": [], "Files": {}}
+
+        entry["Directories"].sort()
+        self.directories[directory] = entry
+        self.is_changed = True
+        return entry
+
+    def add_directory_entry(self, entry, directory_entry, old_files):
+        # Entries that can't be read (e.g. dangling links) are skipped.
+        try:
+            if directory_entry.is_dir():
+                if directory_entry.name.startswith(".") == False:
+                    entry["Directories"].append(directory_entry.name)
+                return
+
+            kind = get_content_kind(directory_entry.name)
+            if kind is None:
+                return
+
+            file_stat = directory_entry.stat()
+        except OSError:
+            return
+
+        record = old_files.get(directory_entry.name)
+        if record is None or record["Size"] != file_stat.st_size or record["Mtime"] != file_stat.st_mtime_ns:
+            record = make_record(directory_entry.path, directory_entry.name, kind, file_stat)
+        entry["Files"][directory_entry.name] = record
+
+    def collect(self, path):
+        # The hierarchy of content folders is flat: Meshes, actions and action lists are found in path and its direct subfolders.
+        # Deeper folders are not searched, because that might take an inordinate amount of time on large directories.
+        # Textures are looked up next to the mesh that uses them, see MeshPort.find_texture.
+        if self.is_loaded == False:
+            self.load()
+
+        content_scan = ContentScan()
+        root_entry = self.scan_directory(path)
+        if root_entry is None:
+            return content_scan
+
+        self.add_records(content_scan, root_entry)
+        for name in root_entry["Directories"]:
+            entry = self.scan_directory(os.path.join(path, name))
+            if entry:
+                self.add_records(content_scan, entry)
+
+        self.save()
+        return content_scan
+
+    def add_records(self, content_scan, entry):
+        for name in sorted(entry["Files"]):
+            content_scan.add(entry["Files"][name])
+
+    def get_header(self, record):
+        # Files can change without the mtime of their folder, so the header is only used as long as the file is the same.
+        try:
+            file_stat = os.stat(record["Path"])
+        except OSError:
+            return {}
+
+        if record["Size"] != file_stat.st_size or record["Mtime"] != file_stat.st_mtime_ns:
+            record.update(make_record(record["Path"], os.path.basename(record["Path"]), record["Kind"], file_stat))
+        if record["Header"] is None:
+            record["Header"] = read_header(record["Path"], record["Kind"])
+            self.is_changed = True
+
+        return record["Header"]
+
+
+class ContentLookup:
+    """Finds content files by name. Built once per search, so looking up many names doesn't go through all files each time."""
+
+    def __init__(self, paths, name_map=None):
+        # name_map: {lowercase old name: new name}, e.g. MetaData.action_map
+        self.paths = paths
+        self.name_map = name_map or {}
+        # {stem: path}
+        self.stems = {}
+        # Files under the new name of their stem, for names that no file has itself.
+        self.remapped_names = {}
+        # {name: path} of the datablocks inside of blend files, see find_contained
+        self.contained_names = None
+        for path in paths:
+            stem = get_content_stem(os.path.basename(path))
+            self.add_preferred(self.stems, stem, path)
+            if stem.lower() in self.name_map:
+                self.add_preferred(self.remapped_names, self.name_map[stem.lower()], path)
+
+    def add_preferred(self, names, name, path):
+        # Blend files are preferred over legacy files, otherwise the first file stays.
+        old_path = names.get(name)
+        if old_path is None or (is_blend_file(path) and is_blend_file(old_path) == False):
+            names[name] = path
+
+    def get_file_count(self):
+        return len(self.paths)
+
+    def find(self, name):
+        # Look for updated file or name change first.
+        replacement = self.name_map.get(name.lower())
+        if replacement and replacement in self.stems:
+            return self.stems[replacement]
+
+        return self.stems.get(name) or self.remapped_names.get(name)
+
+    def find_contained(self, name, list_contained_names):
+        # Finds a blend file that holds a datablock with this name, like an action or a tool in a bigger library.
+        # list_contained_names(path) returns the names inside of a file. It is only called once per file, because it has to open them.
+        if self.contained_names is None:
+            self.contained_names = {}
+            for path in self.paths:
+                if is_blend_file(path):
+                    for contained_name in list_contained_names(path):
+                        self.contained_names.setdefault(contained_name, path)
+
+        return self.contained_names.get(name)
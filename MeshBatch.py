@@ -0,0 +1,107 @@
+# --------------------------
+# MeshBatch: Imports many .mesh files at once. The files are parsed by worker processes, only the objects are built in blender.
+# 18.10.2026
+# --------------------------
+
+import bpy
+import os
+from concurrent.futures import BrokenExecutor
+
+from . import MeshPort
+from . import MeshParser
+from . import WorkerPool
+from . import ContentIndex
+
+
+class MeshBatch:
+    """Imports several mesh files. Call build_ready() repeatedly until is_finished() (e.g. from a modal operator)."""
+
+    def __init__(self, paths, insert_collection=None, reuse_materials=True):
+        # Every file is only imported once.
+        self.paths = list(dict.fromkeys(paths))
+        self.insert_collection = insert_collection
+        self.reuse_materials = reuse_materials
+        # {path: [objects]}
+        self.imported_objects = {}
+        # Files that can be built right away: [[path, mesh_data]]. mesh_data is None for .meshblend files.
+        self.ready = []
+        # Keyed by path
+        self.parse_jobs = None
+        self.finished_count = 0
+
+    def get_total(self):
+        return len(self.paths)
+
+    def is_finished(self):
+        return self.finished_count >= len(self.paths)
+
+    def start(self):
+        self.parse_jobs = WorkerPool.ParseJobs("mesh", "MeshParser", "read_mesh_file_arrays", MeshPort.get_mesh_cache())
+        legacy_paths = {path: path for path in self.paths if ContentIndex.is_blend_file(path) == False}
+        self.ready += [[path, None] for path in self.paths if path not in legacy_paths]
+        cached, unparsed_paths = self.parse_jobs.start(legacy_paths)
+        self.ready += [[path, MeshParser.MeshData.from_arrays(arrays)] for path, arrays in cached.items()]
+        # Without mesh data, the file is read on the main thread.
+        self.ready += [[path, None] for path in unparsed_paths]
+
+    def wait(self, timeout=None):
+        if len(self.ready) == 0:
+            self.parse_jobs.wait(timeout)
+
+    def collect_parsed(self):
+        for key, path, result in self.parse_jobs.collect():
+            if isinstance(result, BrokenExecutor):
+                print(f"Mesh worker stopped, parsing {os.path.basename(path)} in blender instead: {result}")
+                self.ready.append([path, None])
+            elif isinstance(result, BaseException):
+                print(f"While reading {os.path.basename(path)} mesh: {result}")
+                self.imported_objects[path] = []
+                self.finished_count += 1
+            else:
+                self.ready.append([path, MeshParser.MeshData.from_arrays(result)])
+
+    def build_ready(self, max_count=None):
+        self.collect_parsed()
+
+        build_count = len(self.ready) if max_count is None else min(max_count, len(self.ready))
+        for path, mesh_data in self.ready[0:build_count]:
+            if ContentIndex.is_blend_file(path) == False:
+                # Without mesh data, the file is read on the main thread.
+                new_objects = MeshPort.import_mesh_data(path, mesh_data, self.insert_collection, self.reuse_materials)
+            else:
+                new_objects = MeshPort.import_mesh(path, self.insert_collection, self.reuse_materials)
+
+            self.imported_objects[path] = [new_object for new_object in new_objects if new_object]
+            self.finished_count += 1
+
+        del self.ready[0:build_count]
+        return build_count
+
+    def shutdown(self):
+        if self.parse_jobs:
+            self.parse_jobs.shutdown()
+
+    def cancel(self):
+        self.shutdown()
+        self.ready.clear()
+
+
+def import_meshes(paths, insert_collection=None, reuse_materials=True):
+    # Blocking version for imports that happen inside of other operators. Returns {path: [objects]}
+    batch = MeshBatch(paths, insert_collection, reuse_materials)
+    if batch.get_total() == 0:
+        return batch.imported_objects
+
+    wm = bpy.context.window_manager
+    wm.progress_begin(0, batch.get_total())
+    try:
+        batch.start()
+        while batch.is_finished() == False:
+            batch.wait()
+            batch.build_ready()
+            wm.progress_update(batch.finished_count)
+    finally:
+        batch.shutdown()
+        wm.progress_end()
+
+    return batch.imported_objects
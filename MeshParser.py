@@ -0,0 +1,287 @@
+# --------------------------
+# MeshParser: Reads legacy .mesh files into arrays. Doesn't depend on bpy, so it can be used outside of blender.
+# 18.10.2026
+# --------------------------
+
+import numpy as np
+from enum import Enum
+
+# Increase this whenever the arrays of a parsed mesh change. Cached meshes will be parsed again then.
+CACHE_VERSION = 3
+
+
+class mesh_import_state(Enum):
+    EMPTY = 0
+    VERTICES = 1
+    FACES = 2
+    VGROUPS = 3
+    FACEMATS = 4
+    MATERIALS = 5
+    UVCOORDS = 6
+    TEXTURES = 7
+    OBJECT = 8
+    MODIFIERS = 9
+
+
+def get_mesh_import_state(line):
+    key = line[0:-1]
+
+    if key == "[Object]":
+        return mesh_import_state.OBJECT, "Loading Object"
+    elif key == "[Vertices]":
+        return mesh_import_state.VERTICES, "Loading Vertices"
+
+    elif key == "[Faces]":
+        return mesh_import_state.FACES, "Loading Faces"
+
+    elif key == "[VGroups]":
+        return mesh_import_state.VGROUPS, "Loading Vertex Groups"
+
+    elif key == "[UVCoords]":
+        return mesh_import_state.UVCOORDS, "Assigning UV Coordinates"
+
+    elif key == "[Material]":
+        return mesh_import_state.MATERIALS, "Loading Materials"
+
+    elif key == "[FaceMats]":
+        return mesh_import_state.FACEMATS, "Linking Faces to Materials"
+
+    elif key == "[Texture]":
+        return mesh_import_state.TEXTURES, "Loading Textures"
+
+    # TODO: [Modifier]
+    return mesh_import_state.EMPTY, "Undefined"
+
+
+def GetParameters(line):
+    name_and_values = line.split("=")
+    return name_and_values[0], name_and_values[1].split(",")
+
+
+# Bulk parsing: A whole section is parsed at once instead of one line after another.
+def ReadFloatArray(lines, separator=" "):
+    return np.fromstring(separator.join(lines), dtype=np.float32, sep=separator)
+
+
+def ReadIntArray(lines, separator=" "):
+    return np.fromstring(separator.join(lines), dtype=np.int32, sep=separator)
+
+
+def ReadFaceArrays(lines):
+    # Faces can have a different number of vertices, so the size of each face is needed to know where it starts.
+    lines = [line for line in lines if not line.isspace()]
+    face_sizes = np.fromiter((len(line.split()) for line in lines), dtype=np.int32, count=len(lines))
+    face_indices = ReadIntArray(lines)
+    return face_sizes, face_indices
+
+
+def ReadUVArray(lines):
+    # Each line holds the UVs of one face ("Index=u,v,u,v,..."), so all lines together follow the loop order.
+    uv_values = [line.split("=", 1)[1].strip() for line in lines if "=" in line]
+    return ReadFloatArray(uv_values, separator=",")
+
+
+# Parameters of the [Material] section and the Principled BSDF input they are written to.
+material_color_inputs = {"Color": "Base Color", "Emission_Color": "Emission", "Subsurface_Color": "Subsurface Color"}
+material_value_inputs = {"Spec": "Specular", "Metallic": "Metallic", "Roughness": "Roughness",
+                         "Emission_Strength": "Emission Strength", "Subsurface_Strength": "Subsurface"}
+
+
+def ReadMaterialInput(inputs, param_name, values):
+    # Later parameters overwrite earlier ones, just like setting the node inputs one after another.
+    if param_name in material_color_inputs:
+        inputs[material_color_inputs[param_name]] = [float(values[0]), float(values[1]), float(values[2]), 1.0]
+
+    elif param_name in material_value_inputs:
+        inputs[material_value_inputs[param_name]] = float(values[0])
+
+    elif param_name == "Ref":
+        inputs["Roughness"] = 1.0 - float(values[0])
+
+    elif param_name == "Hardness":
+        # Legacy from Blender 2.7
+        # 'convert' to roughness which is somewhat the opposite.
+        hardness = float(int(values[0]))/100.0
+        inputs["Roughness"] = 1.0 - max(min(hardness, 1.0), 0.0)
+
+
+# Number of lines that are parsed at once. Keeps the text of large sections from being held in memory all at once.
+SECTION_CHUNK_SIZE = 16384
+
+
+class SectionReader:
+    """Collects the lines of one section and hands them to a bulk parser chunk by chunk."""
+
+    def __init__(self, read_chunk):
+        self.read_chunk = read_chunk
+        self.lines = []
+        self.chunks = []
+
+    def add_line(self, line):
+        self.lines.append(line)
+        if len(self.lines) >= SECTION_CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if len(self.lines) > 0:
+            self.chunks.append(self.read_chunk(self.lines))
+            self.lines = []
+
+    def finish(self):
+        self.flush()
+        if len(self.chunks) == 0:
+            return self.read_chunk([])
+
+        # ReadFaceArrays returns two arrays per chunk
+        if isinstance(self.chunks[0], tuple):
+            return tuple(np.concatenate(arrays) for arrays in zip(*self.chunks))
+
+        return np.concatenate(self.chunks)
+
+
+class MeshData:
+    """Parsed content of a .mesh file. Geometry is kept as flat arrays, materials as plain records."""
+
+    def __init__(self):
+        self.coordinates = np.zeros((0, 3), dtype=np.float32)
+        self.face_sizes = np.zeros(0, dtype=np.int32)
+        self.face_indices = np.zeros(0, dtype=np.int32)
+        self.uvs = np.zeros(0, dtype=np.float32)
+        self.face_materials = np.zeros(0, dtype=np.int32)
+        # All vertex group indices one after another. vertex_group_sizes tells where a group ends.
+        self.vertex_group_names = []
+        self.vertex_group_sizes = np.zeros(0, dtype=np.int32)
+        self.vertex_group_indices = np.zeros(0, dtype=np.int32)
+        # {"Name": str, "Inputs": {principled_input_name: value}, "Textures": [[[param_name, values]]]}
+        self.materials = []
+        # Loc, Rot and Size of the object
+        self.object_params = {}
+
+    def get_face_offsets(self):
+        face_offsets = np.zeros(len(self.face_sizes), dtype=np.int32)
+        np.cumsum(self.face_sizes[:-1], out=face_offsets[1:])
+        return face_offsets
+
+    def get_vertex_groups(self):
+        group_ends = np.cumsum(self.vertex_group_sizes)
+        group_starts = group_ends - self.vertex_group_sizes
+        return [[group_name, self.vertex_group_indices[start:end]]
+                for group_name, start, end in zip(self.vertex_group_names, group_starts, group_ends)]
+
+    def set_vertex_groups(self, vertex_groups):
+        self.vertex_group_names = [group_name for group_name, vertex_indices in vertex_groups]
+        self.vertex_group_sizes = np.array([len(vertex_indices) for group_name, vertex_indices in vertex_groups], dtype=np.int32)
+        self.vertex_group_indices = np.concatenate(
+            [np.asarray(vertex_indices, dtype=np.int32) for group_name, vertex_indices in vertex_groups] + [np.zeros(0, dtype=np.int32)])
+
+    def to_arrays(self):
+        # Arrays and plain records, so it can be sent to other processes and cached, see ContentCache.pack_records.
+        records = {
+            "Object": self.object_params,
+            "Materials": self.materials,
+            "VertexGroupNames": self.vertex_group_names
+        }
+        return {
+            "Coordinates": self.coordinates,
+            "FaceSizes": self.face_sizes,
+            "FaceIndices": self.face_indices,
+            "UVs": self.uvs,
+            "FaceMaterials": self.face_materials,
+            "VertexGroupSizes": self.vertex_group_sizes,
+            "VertexGroupIndices": self.vertex_group_indices,
+            "Records": records,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        mesh_data = cls()
+        records = arrays["Records"]
+        mesh_data.object_params = records["Object"]
+        mesh_data.materials = records["Materials"]
+        mesh_data.vertex_group_names = records["VertexGroupNames"]
+        mesh_data.coordinates = arrays["Coordinates"]
+        mesh_data.face_sizes = arrays["FaceSizes"]
+        mesh_data.face_indices = arrays["FaceIndices"]
+        mesh_data.uvs = arrays["UVs"]
+        mesh_data.face_materials = arrays["FaceMaterials"]
+        mesh_data.vertex_group_sizes = arrays["VertexGroupSizes"]
+        mesh_data.vertex_group_indices = arrays["VertexGroupIndices"]
+        return mesh_data
+
+
+def read_mesh_lines(lines):
+    # lines can be any iterable, like an open file. It is only read once and never held as a whole.
+    mesh_data = MeshData()
+    vertex_reader = SectionReader(ReadFloatArray)
+    face_reader = SectionReader(ReadFaceArrays)
+    uv_reader = SectionReader(ReadUVArray)
+    face_material_reader = SectionReader(ReadIntArray)
+    vertex_group_readers = []
+    current_material = None
+
+    mode = mesh_import_state.EMPTY
+    for line in lines:
+        if line[0] == "[":
+            mode, loadtext = get_mesh_import_state(line)
+
+            if mode == mesh_import_state.MATERIALS:
+                current_material = None
+            elif mode == mesh_import_state.TEXTURES and current_material:
+                current_material["Textures"].append([])
+            continue
+
+        if mode == mesh_import_state.VERTICES:
+            vertex_reader.add_line(line)
+
+        elif mode == mesh_import_state.FACES:
+            face_reader.add_line(line)
+
+        elif mode == mesh_import_state.UVCOORDS:
+            uv_reader.add_line(line)
+
+        elif mode == mesh_import_state.FACEMATS:
+            face_material_reader.add_line(line)
+
+        elif mode == mesh_import_state.VGROUPS:
+            line = line.strip()
+            if line.endswith(":"):
+                vertex_group_readers.append([line[0:-1], SectionReader(ReadIntArray)])
+            elif len(line) > 0 and len(vertex_group_readers) > 0:
+                vertex_group_readers[-1][1].add_line(line)
+
+        elif mode == mesh_import_state.OBJECT:
+            param_name, values = GetParameters(line.strip())
+            if param_name == "Loc" or param_name == "Rot" or param_name == "Size":
+                mesh_data.object_params[param_name] = [float(value) for value in values]
+            # "Mode": Unfortunately, I don't know what this is used for. It could refer to Object Modes, but we don't really have to store/load them.
+
+        elif mode == mesh_import_state.MATERIALS:
+            param_name, values = GetParameters(line.strip())
+            if param_name == "Name":
+                current_material = {"Name": values[0], "Inputs": {}, "Textures": []}
+                mesh_data.materials.append(current_material)
+            elif current_material:
+                ReadMaterialInput(current_material["Inputs"], param_name, values)
+
+        elif mode == mesh_import_state.TEXTURES:
+            # Textures belong to the material in front of them.
+            if current_material:
+                current_material["Textures"][-1].append(list(GetParameters(line.strip())))
+
+    mesh_data.coordinates = vertex_reader.finish().reshape(-1, 3)
+    mesh_data.face_sizes, mesh_data.face_indices = face_reader.finish()
+    mesh_data.uvs = uv_reader.finish()
+    mesh_data.face_materials = face_material_reader.finish()
+    mesh_data.set_vertex_groups([[group_name, group_reader.finish()] for group_name, group_reader in vertex_group_readers])
+
+    return mesh_data
+
+
+def read_mesh_file(path):
+    with open(path, "r", encoding="ISO-8859-1") as file:
+        return read_mesh_lines(file)
+
+
+def read_mesh_file_arrays(path):
+    # Entry point of the worker processes. Only arrays and strings are sent back, so no class of this module needs to be pickled.
+    return read_mesh_file(path).to_arrays()
@@ -9,96 +9,72 @@
 
 import bpy
 import os.path
-import glob
 import os
+import json
+import hashlib
+import numpy as np
 from bpy import *
-from enum import Enum
 from pathlib import Path
 
 from . import MetaData
+from . import ContentCache
+from . import MeshParser
+from . import BlendLibrary
 
 
-def ReadFloatList(string):
-    x = 0
-    y = 0
-    list = []
-    for c in string:
-        if c == " " or c == "\n":
-            list.append(float(string[y:x]))
-            y = x
-        x += 1
-    if y == x+1:
-        list.append(float(string[y:x]))
-    return list
-
-
-def ReadIntList(string):
-    x = 0
-    y = 0
-    list = []
-    for c in string:
-        if c == " " or c == "\n":
-            if string[y:x] != " ":
-                list.append(int(string[y:x]))
-            y = x
-        x += 1
-    if y == x+1:
-        list.append(int(string[y:x]))
-    return list
-
-
-class mesh_import_state(Enum):
-    EMPTY = 0
-    VERTICES = 1
-    FACES = 2
-    VGROUPS = 3
-    FACEMATS = 4
-    MATERIALS = 5
-    UVCOORDS = 6
-    TEXTURES = 7
-    OBJECT = 8
-    MODIFIERS = 9
-
-
-def get_mesh_import_state(line):
-    key = line[0:-1]
-
-    if key == "[Object]":
-        return mesh_import_state.OBJECT, "Loading Object"
-    elif key == "[Vertices]":
-        return mesh_import_state.VERTICES, "Loading Vertices"
-
-    elif key == "[Faces]":
-        return mesh_import_state.FACES, "Loading Faces"
-
-    elif key == "[VGroups]":
-        return mesh_import_state.VGROUPS, "Loading Vertex Groups"
-
-    elif key == "[UVCoords]":
-        return mesh_import_state.UVCOORDS, "Assigning UV Coordinates"
-
-    elif key == "[Material]":
-        return mesh_import_state.MATERIALS, "Loading Materials"
-
-    elif key == "[FaceMats]":
-        return mesh_import_state.FACEMATS, "Linking Faces to Materials"
-
-    elif key == "[Texture]":
-        return mesh_import_state.TEXTURES, "Loading Textures"
-
-    return mesh_import_state.EMPTY, "Undefined"
-
-    # war elif # TODO:
-    if line[0:-1] == "[Modifier]":
-        loadtext = "Loading Modifiers"
-        mode = 9
-    else:
-        mode = 0
+def fill_mesh_geometry(mesh, mesh_data: MeshParser.MeshData):
+    # Same result as mesh.from_pydata but without building nested python lists.
+    mesh.vertices.add(len(mesh_data.coordinates))
+    mesh.vertices.foreach_set("co", mesh_data.coordinates.ravel())
+
+    mesh.loops.add(len(mesh_data.face_indices))
+    mesh.loops.foreach_set("vertex_index", mesh_data.face_indices)
+
+    mesh.polygons.add(len(mesh_data.face_sizes))
+    mesh.polygons.foreach_set("loop_start", mesh_data.get_face_offsets())
+    # Newer Blender versions derive loop_total from the loop starts.
+    if not bpy.types.MeshPolygon.bl_rna.properties["loop_total"].is_readonly:
+        mesh.polygons.foreach_set("loop_total", mesh_data.face_sizes)
+
+    mesh.update(calc_edges=True)
+
+
+def assign_uv_coordinates(mesh, uvs):
+    if len(uvs) != len(mesh.loops) * 2:
+        print(f"{mesh.name} has {len(uvs) // 2} UV coordinates for {len(mesh.loops)} face corners. UV coordinates were not assigned.")
+        return False
+
+    mesh.uv_layers.active.data.foreach_set("uv", uvs)
+    return True
+
+
+def assign_vertex_groups(target_object, vertex_groups):
+    # vertex_groups holds [group_name, vertex_indices] in file order. Each group gets all of its indices in one call.
+    for group_name, vertex_indices in vertex_groups:
+        mapping = MetaData.get_vgroup_mapping(group_name)
+        if mapping:
+            group_name = mapping
 
+        vertex_group = target_object.vertex_groups.new(name=group_name)
+        if len(vertex_indices) > 0:
+            vertex_group.add(vertex_indices.tolist(), 1.0, "REPLACE")
 
-def GetParameters(line):
-    name_and_values = line.split("=")
-    return name_and_values[0], name_and_values[1].split(",")
+
+def assign_face_materials(mesh, material_indices):
+    if len(material_indices) != len(mesh.polygons):
+        print(f"{mesh.name} has {len(material_indices)} face material indices for {len(mesh.polygons)} faces.")
+        # Faces without an index keep the first material.
+        resized_indices = np.zeros(len(mesh.polygons), dtype=np.int32)
+        count = min(len(material_indices), len(mesh.polygons))
+        resized_indices[:count] = material_indices[:count]
+        material_indices = resized_indices
+
+    mesh.polygons.foreach_set("material_index", material_indices)
+
+
+def shade_smooth(mesh):
+    # Does the same as bpy.ops.object.shade_smooth() but doesn't depend on the selection.
+    mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
 
 
 def lock_object(object, is_locked=True):
@@ -112,19 +88,259 @@ def lock_object(object, is_locked=True):
     object.lock_scale = [is_locked, is_locked, is_locked]
 
 
-def import_mesh(path, insert_collection=None, reuse_materials=True):
-    meshpath = Path(path)
+def get_mesh_cache():
+    return ContentCache.get_cache("Meshes", MeshParser.CACHE_VERSION)
+
+
+def read_mesh_file_cached(path):
+    cache = get_mesh_cache()
+    if cache:
+        arrays = cache.load(path)
+        if arrays is not None:
+            return MeshParser.MeshData.from_arrays(arrays)
+
+    mesh_data = MeshParser.read_mesh_file(path)
+    if cache:
+        cache.store(path, mesh_data.to_arrays())
+
+    return mesh_data
+
+
+# Textures that were found next to mesh files: {content_directory: (directory_mtimes, {lowercase file name: [paths]})}
+texture_indices = {}
+
+
+def build_texture_index(content_directory):
+    # Textures are searched in the folders inside the mesh folder (e.g. Clonks/Textures/FaceGob.png).
+    directory_mtimes = {content_directory: os.stat(content_directory).st_mtime_ns}
+    texture_index = {}
+    with os.scandir(content_directory) as content_entries:
+        for content_entry in sorted(content_entries, key=lambda entry: entry.name):
+            if content_entry.is_dir() == False:
+                continue
+            # Like glob, folders that can't be read are skipped.
+            try:
+                directory_mtime = content_entry.stat().st_mtime_ns
+                with os.scandir(content_entry.path) as file_entries:
+                    file_paths = [(file_entry.name.lower(), file_entry.path)
+                                  for file_entry in sorted(file_entries, key=lambda entry: entry.name) if file_entry.is_file()]
+            except OSError as Err:
+                print(f"Could not look for textures in {content_entry.path}: {Err}")
+                continue
+
+            directory_mtimes[content_entry.path] = directory_mtime
+            for file_name, file_path in file_paths:
+                texture_index.setdefault(file_name, []).append(file_path)
+
+    return directory_mtimes, texture_index
+
+
+def is_texture_index_valid(directory_mtimes):
+    for directory, mtime in directory_mtimes.items():
+        try:
+            if os.stat(directory).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+
+    return True
+
+
+def find_texture(content_directory, texture_file_name):
+    cached_index = texture_indices.get(content_directory)
+    if cached_index is None or is_texture_index_valid(cached_index[0]) == False:
+        cached_index = build_texture_index(content_directory)
+        texture_indices[content_directory] = cached_index
+
+    return cached_index[1].get(texture_file_name.lower(), [])
+
+
+def apply_texture(material, principled_bsdf, texture_parameters, mesh_path):
+    for param_name, values in texture_parameters:
+        if param_name == "Name":
+            tex = bpy.data.textures.find(values[0])
+            if tex is None:
+                tex = bpy.data.textures.new(values[0])
+            else:
+                return
+
+        if param_name == "Image":
+            material.use_nodes = True
+            node_tree = material.node_tree
+            texture_node = node_tree.nodes.new(
+                "ShaderNodeTexImage")
+
+            node_tree.links.new(
+                principled_bsdf.inputs['Base Color'], texture_node.outputs['Color'])
+
+            tex_file_name = values[0].split("/")
+            content_directory = os.path.dirname(os.path.abspath(mesh_path))
+            paths_to_image = find_texture(content_directory, tex_file_name[len(tex_file_name)-1].replace("\n", ""))
+
+            if len(paths_to_image) > 0:
+                # Meshes that share a texture also share the image
+                img = bpy.data.images.load(paths_to_image[0], check_existing=True)
+                texture_node.image = img
+            else:
+                print("Texture " + tex_file_name[len(
+                    tex_file_name)-1] + " was not found. Searched in the folders inside " + content_directory)
+
+        if param_name == "Type":
+            # Could be added, if needed.
+            # tex.setType(values[0])
+            pass
+
+        if param_name == "Texco":
+            # This is usually just UVCoordinates which is the default
+            # texco = values[0]
+            pass
+
+
+# Materials that were built from a material record: {record key: material name}
+built_materials = {}
+
+
+def get_material_record_key(material_record, mesh_path):
+    # Textures are searched next to the mesh file, so the same record can mean another image in another folder.
+    content_directory = os.path.dirname(os.path.abspath(mesh_path)) if len(material_record["Textures"]) > 0 else ""
+    record = [material_record["Name"], material_record["Inputs"], material_record["Textures"], content_directory]
+    return hashlib.sha1(json.dumps(record, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_built_material(record_key):
+    material_name = built_materials.get(record_key)
+    if material_name is None:
+        return None
+
+    # The material might have been removed or renamed in the meantime.
+    mat = bpy.data.materials.get(material_name)
+    if mat is None or mat.get("RenderClonkRecord") != record_key:
+        del built_materials[record_key]
+        return None
+
+    return mat
+
+
+def build_material(material_record, mesh_path):
+    mat = bpy.data.materials.new(name=material_record["Name"])
+    mat.use_nodes = True
+    # Looked up once for all inputs and textures of this material.
+    principled_bsdf = mat.node_tree.nodes['Principled BSDF']
+    principled_inputs = principled_bsdf.inputs
+
+    for input_name, value in material_record["Inputs"].items():
+        principled_inputs[input_name].default_value = value
+
+    for texture_parameters in material_record["Textures"]:
+        apply_texture(mat, principled_bsdf, texture_parameters, mesh_path)
+
+    return mat
+
+
+def build_materials(new_object, materials, mesh_path, reuse_materials=True):
+    # Identical records (e.g. of several tools that are imported together) share one material.
+    deduplicate = reuse_materials
+    for material_record in materials:
+        if bpy.data.materials.find(material_record["Name"]) > -1 and reuse_materials:
+            # Just ignore the parameters and textures of this material
+            new_object.data.materials.append(bpy.data.materials[material_record["Name"]])
+            continue
+
+        record_key = get_material_record_key(material_record, mesh_path)
+        mat: bpy.types.Material = get_built_material(record_key) if deduplicate else None
+        if mat is None:
+            mat = build_material(material_record, mesh_path)
+            mat["RenderClonkRecord"] = record_key
+            built_materials[record_key] = mat.name
+
+        reuse_materials = False
+        new_object.data.materials.append(mat)
+
+
+def build_mesh_object(mesh_data: MeshParser.MeshData, name, mesh_path, reuse_materials=True):
+    new_mesh = bpy.data.meshes.new(name + "_mesh")
+    new_object = bpy.data.objects.new(name, new_mesh)
+
+    object_params = mesh_data.object_params
+    if object_params.get("Loc"):
+        values = object_params["Loc"]
+        new_object.location = [values[0], values[1], values[2]]
+    if object_params.get("Rot"):
+        values = object_params["Rot"]
+        if len(values) == 3:
+            new_object.rotation_euler = [values[0], values[1], values[2]]
+        elif len(values) == 4:
+            new_object.rotation_quaternion = [values[0], values[1], values[2], values[3]]
+    if object_params.get("Size"):
+        values = object_params["Size"]
+        new_object.scale = [values[0], values[1], values[2]]
+
+    fill_mesh_geometry(new_mesh, mesh_data)
+    new_mesh.uv_layers.new()
+    if len(mesh_data.uvs) > 0:
+        assign_uv_coordinates(new_mesh, mesh_data.uvs)
+
+    assign_vertex_groups(new_object, mesh_data.get_vertex_groups())
+
+    build_materials(new_object, mesh_data.materials, mesh_path, reuse_materials)
+    if len(mesh_data.face_materials) > 0:
+        assign_face_materials(new_mesh, mesh_data.face_materials)
+    shade_smooth(new_mesh)
+
+    if len(new_object.vertex_groups) == 0 and MetaData.get_vgroup_mapping(new_object.name):
+        new_object.vertex_groups.new(
+            name=MetaData.get_vgroup_mapping(new_object.name))
+        new_object.vertex_groups.active.add(
+            range(len(new_object.data.vertices)), 1.0, "REPLACE")
+
+    return new_object
+
+
+def get_object_dependencies(objects):
+    # Appended objects bring their parents and armatures along, but these are not linked to any collection yet.
+    dependencies = []
+    pending_objects = list(objects)
+    while len(pending_objects) > 0:
+        pending_object = pending_objects.pop(0)
+        if pending_object is None or pending_object in dependencies:
+            continue
+
+        dependencies.append(pending_object)
+        pending_objects.append(pending_object.parent)
+        for modifier in pending_object.modifiers:
+            if modifier.type == "ARMATURE":
+                pending_objects.append(modifier.object)
+
+    return dependencies
+
+
+def load_library_objects(path, object_names=None):
+    # object_names: Objects or collections in the library. Only these are loaded, together with the objects they depend on.
+    if object_names is None:
+        return list(BlendLibrary.load_datablocks(path, {"objects": None})["objects"].values())
+
+    # Names that aren't objects are skipped as collections and the other way around, so the library is opened once.
+    loaded = BlendLibrary.load_datablocks(path, {"objects": object_names, "collections": object_names})
+    new_objects = list(loaded["objects"].values())
+    for collection in loaded["collections"].values():
+        new_objects += collection.all_objects
+        # Just like whole files, only the objects are added.
+        bpy.data.collections.remove(collection)
+
+    return get_object_dependencies(new_objects)
+
+
+def import_mesh(path, insert_collection=None, reuse_materials=True, object_names=None):
+    # object_names: Only for .meshblend files. The objects or collections to import, all objects if None.
     print('Importing "' + path + '"')
-    filename = meshpath.stem
 
     if os.path.exists(path) == False:
         raise FileNotFoundError("No valid mesh file at: " + path)
 
     if ".meshblend" in path or ".mesh.blend" in path:
-        with bpy.data.libraries.load(path) as (data_from, data_to):
-            data_to.objects = data_from.objects
+        new_objects = load_library_objects(path, object_names)
 
-        for new_object in data_to.objects:
+        for new_object in new_objects:
             lock_object(new_object, True)
             # Default: Add to scene collection
             if insert_collection == None:
@@ -134,227 +350,23 @@ def import_mesh(path, insert_collection=None, reuse_materials=True):
                 insert_collection.objects.link(new_object)
 
         if reuse_materials:
-            MetaData.replace_duplicate_materials(data_to.objects)
+            MetaData.replace_duplicate_materials(new_objects)
 
-        return data_to.objects # Return all objects and filter later
+        # Only the asked for objects (or all of them) and the objects they depend on, see load_library_objects.
+        return new_objects
 
     # Legacy import method for .mesh files.
-    new_object = None
-    file = None
-    try:
-
-        file = open(path, "r", encoding="ISO-8859-1")  # Loading a .mesh file
-        tex = 0
+    return import_mesh_data(path, None, insert_collection, reuse_materials)
 
-        mode = 0
 
-        lines = file.readlines()
-
-        verts = []
-        faces = []
-        new_mesh = bpy.data.meshes.new(filename + "_mesh")
-        new_object = bpy.data.objects.new(filename, new_mesh)
-        # This is used to measure at what UV index we are. It depends on the number of vertices per face we checked.
-        faceloop_index = 0
-        current_mat_name = ""
-
-        for line in lines:
-            if line[0] == "[":
-
-                last_mode = mode
-                mode, loadtext = get_mesh_import_state(line)
-
-                if last_mode == mesh_import_state.FACES and mode != mesh_import_state.FACES:
-                    new_mesh.from_pydata(verts, [], faces)
-                    new_object.data.uv_layers.new()
-
-            else:
-                if mode == mesh_import_state.OBJECT:
-                    param_name, values = GetParameters(line)
-                    if param_name == "Loc":
-                        new_object.location = [
-                            float(values[0]), float(values[1]), float(values[2])]
-                    if param_name == "Rot":
-                        if len(values) == 3:
-                            new_object.rotation_euler = [
-                                float(values[0]), float(values[1]), float(values[2])]
-                        elif len(values) == 4:
-                            new_object.rotation_quaternion = [float(values[0]), float(
-                                values[1]), float(values[2]), float(values[4])]
-                    if param_name == "Size":
-                        new_object.scale = [float(values[0]), float(
-                            values[1]), float(values[2])]
-
-                    if param_name == "Mode":
-                        # mesh.mode = int(values[0])
-                        # Unfortunately, I don't know what this is used for. It could refer to Object Modes, but we don't really have to store/load them.
-                        pass
-
-                if mode == mesh_import_state.VERTICES:
-                    verts.append(ReadFloatList(line))
-
-                if mode == mesh_import_state.FACES:
-                    faces.append(ReadIntList(line))
-
-                if mode == mesh_import_state.VGROUPS:
-                    if line != "\n":
-                        if line[-2] == ":":
-                            group_name = line[0:-2]
-
-                            mapping = MetaData.get_vgroup_mapping(group_name)
-                            if mapping:
-                                group_name = mapping
-
-                            new_object.vertex_groups.new(name=group_name)
-                        else:
-                            new_object.vertex_groups.active.add(
-                                ReadIntList(line), 1.0, "REPLACE")
-
-                if mode == mesh_import_state.UVCOORDS:
-                    coordinates = line.split("=")[1]
-                    UVs = coordinates.split(",")
-
-                    for index in range(0, len(UVs), 2):
-                        new_mesh.uv_layers.active.data[faceloop_index].uv = [
-                            float(UVs[index]), float(UVs[index+1])]
-                        faceloop_index += 1
-
-                if mode == mesh_import_state.MATERIALS:
-                    param_name, values = GetParameters(line)
-                    if param_name == "Name":
-
-                        current_mat_name = values[0][0:-1]
-                        mat: bpy.types.Material = None
-                        if bpy.data.materials.find(current_mat_name) > -1 and reuse_materials:
-                            mat = bpy.data.materials[current_mat_name]
-                        else:
-                            mat = bpy.data.materials.new(name=current_mat_name)
-                            mat.use_nodes = True
-                            reuse_materials = False
-
-                        current_mat_name = mat.name
-                        new_object.data.materials.append(mat)
-
-                        if reuse_materials:
-                            # Just ignore the next lines about materials
-                            mode = mesh_import_state.EMPTY
-                            current_mat_name = ""
-
-                    elif param_name == "Color":
-                        bpy.data.materials.get(current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Base Color'].default_value = [
-                            float(values[0]), float(values[1]), float(values[2]), 1.0]
-
-                    elif param_name == "Ref":
-                        bpy.data.materials.get(
-                            current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Roughness'].default_value = 1.0 - float(values[0])
-
-                    elif param_name == "Spec":
-                        bpy.data.materials.get(
-                            current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Specular'].default_value = float(values[0])
-
-                    elif param_name == "Hardness":
-                        # Legacy from Blender 2.7
-                        # 'convert' to roughness which is somewhat the opposite.
-                        hardness = float(int(values[0]))/100.0
-                        bpy.data.materials.get(
-                            current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Roughness'].default_value = 1.0 - max(min(hardness, 1.0), 0.0)
-
-                # For new shader values
-                    elif param_name == "Metallic":
-                        bpy.data.materials.get(
-                            current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Metallic'].default_value = float(values[0])
-
-                    elif param_name == "Roughness":
-                        bpy.data.materials.get(
-                            current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Roughness'].default_value = float(values[0])
-
-                    elif param_name == "Emission_Strength":
-                        bpy.data.materials.get(
-                            current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Emission Strength'].default_value = float(values[0])
-
-                    elif param_name == "Emission_Color":
-                        bpy.data.materials.get(current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Emission'].default_value = [
-                            float(values[0]), float(values[1]), float(values[2]), 1.0]
-
-                    elif param_name == "Subsurface_Color":
-                        bpy.data.materials.get(current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Subsurface Color'].default_value = [
-                            float(values[0]), float(values[1]), float(values[2]), 1.0]
-
-                    elif param_name == "Subsurface_Strength":
-                        bpy.data.materials.get(
-                            current_mat_name).node_tree.nodes['Principled BSDF'].inputs['Subsurface'].default_value = float(values[0])
-
-                if mode == mesh_import_state.TEXTURES:
-                    if current_mat_name == "": # The last material was already present, so we ignore the texture as well.
-                        mode = mesh_import_state.EMPTY
-                        continue
-
-                    param_name, values = GetParameters(line)
-
-                    if param_name == "Name":
-                        tex = bpy.data.textures.find(values[0])
-                        if tex is None:
-                            tex = bpy.data.textures.new(values[0])
-                        else:
-                            mode = mesh_import_state.EMPTY
-
-                    if param_name == "Image":
-                        current_material = bpy.data.materials.get(
-                            current_mat_name)
-                        current_material.use_nodes = True
-                        node_tree = current_material.node_tree
-                        texture_node = node_tree.nodes.new(
-                            "ShaderNodeTexImage")
-
-                        node_tree.links.new(
-                            node_tree.nodes['Principled BSDF'].inputs['Base Color'], texture_node.outputs['Color'])
-
-                        tex_file_name = values[0].split("/")
-                        searching_path = os.path.join(os.path.dirname(
-                            path), "**", tex_file_name[len(tex_file_name)-1].replace("\n", ""))
-                        paths_to_image = glob.glob(searching_path)
-
-                        if len(paths_to_image) > 0:
-                            img = bpy.data.images.load(paths_to_image[0])
-                            texture_node.image = img
-                        else:
-                            print("Texture " + tex_file_name[len(
-                                tex_file_name)-1] + " was not found. Searched recursively for " + searching_path)
-
-                    if param_name == "Type":
-                        # Could be added, if needed.
-                        # tex.setType(values[0])
-                        pass
-
-                    if param_name == "Texco":
-                        # This is usually just UVCoordinates which is the default
-                        # texco = values[0]
-                        pass
-                
-                if mode == mesh_import_state.FACEMATS:
-                    mat_list = ReadIntList(line)
-                    list_index = 0
-                    for material_index in mat_list:
-                        new_object.data.polygons[list_index].material_index = material_index
-                        list_index += 1
-
-                # TODO: Load Modifiers
-                if mode == mesh_import_state.MODIFIERS:
-                    param_name, values = GetParameters(line)
-                    print("Loading modifiers is not supported yet. " +
-                          str(values[0]))
-                    continue
-                    if ReadParameter(line, 0, 0) == "Type":
-                        tex = ob.modifiers.append(ReadParameter(line, 1, 2))
-                    if ReadParameter(line, 0, 0) == "Height":
-                        tex[Modifier.Settings.HEIGHT] = ReadParameter(
-                            line, 1, 1)
-
-        if len(new_object.vertex_groups) == 0 and MetaData.get_vgroup_mapping(new_object.name):
-            new_object.vertex_groups.new(
-                name=MetaData.get_vgroup_mapping(new_object.name))
-            new_object.vertex_groups.active.add(
-                range(len(new_object.data.vertices)), 1.0, "REPLACE")
+def import_mesh_data(path, mesh_data, insert_collection=None, reuse_materials=True):
+    # mesh_data can already be parsed (e.g. by MeshBatch). Otherwise the file is read here.
+    filename = Path(path).stem
+    new_object = None
+    try:
+        if mesh_data is None:
+            mesh_data = read_mesh_file_cached(path)
+        new_object = build_mesh_object(mesh_data, filename, path, reuse_materials)
 
         # Default: Add to scene collection
         if insert_collection == None:
@@ -365,7 +377,6 @@ def import_mesh(path, insert_collection=None, reuse_materials=True):
         # Select and make active
         bpy.context.view_layer.objects.active = new_object
         new_object.select_set(True)
-        bpy.ops.object.shade_smooth()
         lock_object(new_object, True)
 
     except BaseException as Err:
@@ -375,8 +386,4 @@ def import_mesh(path, insert_collection=None, reuse_materials=True):
         message = f"While reading {path.name} mesh: {Err}"
         print(message)
 
-    finally:
-        if file:
-            file.close()
-
     return [new_object]
@@ -318,6 +318,12 @@ def MakeActionEntry(anim_data):
     new_entry.width = anim_data["Width"]
     new_entry.max_frames = anim_data["Length"]
 
+    # Set when the action is shared with an entry of another name.
+    alternative_name = anim_data.get("AlternativeName")
+    if alternative_name and alternative_name != new_entry.action.name:
+        new_entry.use_alternative_name = True
+        new_entry.alternative_name = alternative_name
+
     return new_entry
 
 def replace_duplicate_materials(in_objects):
@@ -25,3 +25,7 @@ def GetOutputPath():
     if bpy.data.is_saved:
         save_path = os.path.dirname(bpy.data.filepath)
     return os.path.join(save_path, "output_render")
+
+
+def GetCachePath(cache_name):
+    return bpy.utils.user_resource("DATAFILES", path=os.path.join("RenderClonk", "Cache", cache_name))
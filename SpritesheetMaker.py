@@ -14,6 +14,7 @@ from pathlib import Path
 from . import MetaData
 from . import AnimPort
 from . import PathUtilities
+from . import ActionBatch
 
 current_action_name = ""
 current_sheet_number = 1
@@ -286,6 +287,9 @@ def prepare_action(action_entry: MetaData.ActionMetaData):
     if action_entry.action == None:
         raise AssertionError("No Blender action set inside action entry.")
 
+    # Lazily imported actions get their keyframes on first use.
+    AnimPort.materialize_action_entries([action_entry])
+
     for anim_object in MetaData.get_anim_targets():
         if anim_object.type == "ARMATURE":
             AnimPort.ResetArmature(anim_object)
@@ -526,6 +530,11 @@ class TIMER_OT(bpy.types.Operator):
         "ReplaceOverlayMaterial", default=False)
     ###
 
+    @classmethod
+    def poll(cls, context):
+        # A background import assigns actions and adds entries while the spritesheet would be rendered.
+        return ActionBatch.is_running() == False
+
     action_entries = []
     replacement_materials: list
 
@@ -588,6 +597,15 @@ class TIMER_OT(bpy.types.Operator):
             self.cancel_message = message
             return {'RUNNING_MODAL'}
 
+        try:
+            # All at once before rendering starts, instead of one after another during rendering.
+            AnimPort.materialize_action_entries(self.action_entries)
+        except BaseException as Err:
+            self.cancel(context)
+            self.cancel_message_type = "ERROR"
+            self.cancel_message = f"{Err}"
+            return {'RUNNING_MODAL'}
+
         self.has_render_finished = True
         self.sheet_width, self.sheet_height, self.sprite_strips = GetSpritesheetInfo(
             self.action_entries)
@@ -945,6 +963,10 @@ class PREVIEW_OT(bpy.types.Operator):
     keep_ortho_scale = False
     keep_resolution = False
 
+    @classmethod
+    def poll(cls, context):
+        return ActionBatch.is_running() == False
+
     def prepare_preview(self):
         if self.preview_next:
             bpy.context.scene.action_meta_data_index = min(
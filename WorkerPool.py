@@ -0,0 +1,113 @@
+# --------------------------
+# WorkerPool: Starts worker processes that parse content files while blender keeps running.
+# 18.10.2026
+# --------------------------
+
+import os
+import sys
+import site
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, BrokenExecutor, FIRST_COMPLETED, wait
+
+script_file = os.path.realpath(__file__)
+AddonDir = os.path.dirname(script_file)
+
+# Worker processes can't import the addon package, because it needs bpy.
+# They import the parser modules as top level modules instead, so the main process has to know them under the same name.
+# {module_name: module}
+worker_modules = {}
+
+
+def get_worker_module(module_name):
+    # Loaded again after the addon was reloaded, because this module starts with an empty worker_modules then.
+    if module_name not in worker_modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(AddonDir, module_name + ".py"))
+        worker_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(worker_module)
+        sys.modules[module_name] = worker_module
+        worker_modules[module_name] = worker_module
+
+    return worker_modules[module_name]
+
+
+def get_worker_count(task_count):
+    # One core stays free for blender.
+    return max(1, min(task_count, (os.cpu_count() or 2) - 1))
+
+
+def create_worker_pool(task_count):
+    # Raises OSError or RuntimeError if no processes can be started.
+    return ProcessPoolExecutor(max_workers=get_worker_count(task_count),
+                               # Spawn instead of fork: A forked copy of blender is neither safe nor cheap.
+                               mp_context=multiprocessing.get_context("spawn"),
+                               initializer=site.addsitedir, initargs=(AddonDir,))
+
+
+class ParseJobs:
+    """Parses files into arrays, from the cache or in worker processes. What happens with the arrays is up to the batch that uses it."""
+
+    def __init__(self, kind, parser_name, function_name, cache):
+        # kind: Used in messages, e.g. "mesh". parser_name.function_name(path) returns the arrays of a file, see ContentCache.ArrayCache.
+        self.kind = kind
+        self.parser_name = parser_name
+        self.function_name = function_name
+        # None if the content cache is turned off
+        self.cache = cache
+        # {future: (key, path)}
+        self.futures = {}
+        self.executor = None
+
+    def start(self, paths):
+        # paths: {key: path}. Returns {key: arrays} of the cached files and {key: path} of the files that have to be read in blender,
+        # because they are too few for workers or no workers could be started.
+        cached = {}
+        parse_paths = {}
+        for key, path in paths.items():
+            arrays = self.cache.load(path) if self.cache else None
+            if arrays is not None:
+                cached[key] = arrays
+            else:
+                parse_paths[key] = path
+
+        # Starting workers takes a moment, which is not worth it for a single file.
+        if len(parse_paths) > 1:
+            try:
+                self.executor = create_worker_pool(len(parse_paths))
+                parse_file = getattr(get_worker_module(self.parser_name), self.function_name)
+                for key, path in parse_paths.items():
+                    self.futures[self.executor.submit(parse_file, path)] = (key, path)
+                parse_paths = {}
+
+            except (OSError, RuntimeError, BrokenExecutor) as Err:
+                print(f"Could not start {self.kind} workers, parsing in blender instead: {Err}")
+                self.shutdown()
+
+        return cached, parse_paths
+
+    def wait(self, timeout=None):
+        if len(self.futures) > 0:
+            wait(self.futures, timeout=timeout, return_when=FIRST_COMPLETED)
+
+    def collect(self):
+        # Returns [(key, path, arrays or the exception of the worker)] of the files that are done. New arrays go into the cache.
+        results = []
+        for future in [future for future in self.futures if future.done()]:
+            key, path = self.futures.pop(future)
+            try:
+                arrays = future.result()
+            except BaseException as Err:
+                results.append((key, path, Err))
+                continue
+
+            if self.cache:
+                self.cache.store(path, arrays)
+            results.append((key, path, arrays))
+
+        return results
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.futures.clear()
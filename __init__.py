@@ -12,13 +12,22 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 import importlib
+import textwrap
 from . import PathUtilities
 from . import IniPort
 from . import MetaData
+from . import ContentCache
+from . import MeshParser
+from . import AnimParser
+from . import ContentIndex
+from . import BlendLibrary
 from . import ClonkPort
 from . import SpritesheetMaker
 from . import AnimPort
 from . import MeshPort
+from . import MeshBatch
+from . import WorkerPool
+from . import ActionBatch
 import os
 import os.path  # For checking a path
 from pathlib import Path
@@ -49,8 +58,16 @@ bl_info = {
 
 
 importlib.reload(MetaData)
+importlib.reload(ContentCache)
+importlib.reload(MeshParser)
+importlib.reload(AnimParser)
+importlib.reload(ContentIndex)
+importlib.reload(BlendLibrary)
+importlib.reload(WorkerPool)
 importlib.reload(MeshPort)
+importlib.reload(MeshBatch)
 importlib.reload(AnimPort)
+importlib.reload(ActionBatch)
 importlib.reload(SpritesheetMaker)
 importlib.reload(ClonkPort)
 importlib.reload(PathUtilities)
@@ -93,6 +110,26 @@ class MAIN_PT_SettingsPanel(bpy.types.Panel):
 
         actlist_layout.operator(
             Menu_Button.bl_idname, text="Import ActMap...", icon="IMPORT").menu_active = 12
+        actlist_layout.enabled = ActionBatch.is_running() == False
+
+        if ActionBatch.is_running():
+            import_progress_layout = layout.box().row()
+            import_progress_layout.prop(
+                scene, "action_import_progress", text="Action Import")
+            import_progress_layout.label(text=f"{ActionBatch.current_batch.finished_count}/{ActionBatch.current_batch.get_total()} {ActionBatch.current_batch.current_name}")
+            import_progress_layout.operator(
+                ClonkPort.OT_CancelActionImport.bl_idname, text="", icon="CANCEL")
+        elif ActionBatch.last_report:
+            messagetype, message = ActionBatch.last_report
+            import_report_layout = layout.box().row()
+            import_report_column = import_report_layout.column(align=True)
+            for line_index, line in enumerate(textwrap.wrap(message, 50)):
+                line_icon = "BLANK1"
+                if line_index == 0:
+                    line_icon = "INFO" if messagetype == "INFO" else "ERROR"
+                import_report_column.label(text=line, icon=line_icon)
+            import_report_layout.operator(
+                ClonkPort.OT_DismissActionImportReport.bl_idname, text="", icon="X")
 
         layout.separator()
 
@@ -141,6 +178,7 @@ class MAIN_PT_SettingsPanel(bpy.types.Panel):
             action_export_label = "Export Action: None selected"
        
         layout.operator(ClonkPort.OT_AnimExport.bl_idname, text=action_export_label, icon="EXPORT")
+        layout.operator(ClonkPort.OT_ExportLegacyAnimFilebrowser.bl_idname, text="Export Action as .anim...", icon="EXPORT")
 
 
 class Menu_Button(bpy.types.Operator):
@@ -158,6 +196,11 @@ class Menu_Button(bpy.types.Operator):
         if context.scene.lastfilepath is None or context.scene.lastfilepath == "":
             context.scene.lastfilepath = addon_prefs.content_folder
 
+        # Importing an action, rendering and previewing use the action list, which a background import is still filling.
+        if ActionBatch.is_running() and self.menu_active in [2, 5, 8, 14, 15, 16]:
+            self.report({"WARNING"}, "Wait until the action import is finished or cancel it.")
+            return {"CANCELLED"}
+
         # Import Mesh
         if self.menu_active == 1:
             bpy.ops.mesh.open_filebrowser(
@@ -952,6 +995,17 @@ class RenderClonkPreferences(bpy.types.AddonPreferences):
         description="This will export objects and actions immediately to the content folder path",
         default=False,
     )
+    use_content_cache: bpy.props.BoolProperty(
+        name="Cache imported files",
+        description="Keeps a binary copy of parsed .mesh and .anim files, so importing them again doesn't need to parse them. Also remembers which content files a folder has, so unchanged folders are not searched again",
+        default=True,
+    )
+    cache_size_limit: bpy.props.IntProperty(
+        name="Cache size limit (MB)",
+        description="The least recently used cache entries are removed when a cache grows beyond this size",
+        default=256,
+        min=1,
+    )
     number: bpy.props.IntProperty(
         name="Example Number",
         default=4,
@@ -964,6 +1018,11 @@ class RenderClonkPreferences(bpy.types.AddonPreferences):
     def draw(self, context):
         layout = self.layout
         layout.prop(self, "content_folder")
+        cache_row = layout.row()
+        cache_row.prop(self, "use_content_cache")
+        cache_size_layout = cache_row.row()
+        cache_size_layout.enabled = self.use_content_cache
+        cache_size_layout.prop(self, "cache_size_limit")
         #layout.prop(self, "use_quick_export")
 
 
@@ -976,8 +1035,11 @@ registered_classes = [
     ClonkPort.OT_AnimExport,
     ClonkPort.OT_ExportObjectFilebrowser,
     ClonkPort.OT_ExportAnimFilebrowser,
+    ClonkPort.OT_ExportLegacyAnimFilebrowser,
     ClonkPort.OT_ActListFilebrowser,
     ClonkPort.OT_ActMapFilebrowser,
+    ClonkPort.OT_CancelActionImport,
+    ClonkPort.OT_DismissActionImportReport,
     ClonkPort.OT_PictureFilebrowser,
     ACTION_UL_actionslots,
     Action_List_Button,
@@ -1056,9 +1118,13 @@ def register():
         name="Is rendering spritesheet", default=False)
     bpy.types.Scene.spritesheet_render_progress = bpy.props.IntProperty(
         name="Spritesheet Render Progress", subtype="PERCENTAGE", min=0, max=100)
+    bpy.types.Scene.action_import_progress = bpy.props.IntProperty(
+        name="Action Import Progress", subtype="PERCENTAGE", min=0, max=100)
 
 
 def unregister():
+    ActionBatch.cancel_batch(call_finish=False)
+
     for registered_class in registered_classes:
         bpy.utils.unregister_class(registered_class)
 
@@ -1078,6 +1144,7 @@ def unregister():
     del bpy.types.Scene.scene_render_resolution
     del bpy.types.Scene.is_rendering_spritesheet
     del bpy.types.Scene.spritesheet_render_progress
+    del bpy.types.Scene.action_import_progress
 
 
 if __name__ == "__main__":